@@ -4,6 +4,12 @@ import sys
 from DownloadManager.message_handler import MessageHandler
 
 CONF_FILE_NAME = "download_manager.ini"
+ARCHIVE_FILE_NAME = "download_archive.db"
+JOURNAL_FILE_NAME = "job_journal.db"
+METADATA_CACHE_FILE_NAME = "metadata_cache.db"
+PLAYLIST_SYNC_FILE_NAME = "playlist_sync.db"
+METRICS_FILE_NAME = "run_metrics.jsonl"
+PROMETHEUS_FILE_NAME = "download_manager.prom"
 allowed_video_formats = ['6', '5', '4', '3', '2', '1', '0', '-1']
 video_format_to_quality: dict[str, str | None] = {
     '-1': None,
@@ -38,30 +44,98 @@ crf_standard_to_value: dict[str, str] = {
     '3': '21',
     '4': '18',
 }
+allowed_job_orders = ['input', 'shortest_first']
+RENDITION_SECTION_PREFIX = 'rendition:'
 PATH_TO_INDEX_FILE = 'path_to_index_file'
 INDEX_FILE_NAME = 'index_file_name'
+INDEX_STORE_FILE_NAME = 'index_store_file_name'
+PATH_TO_INDEX_STORE_FILE = 'path_to_index_store_file'
 INDEXING_FORMAT = 'indexing_format'
+INDEX_FLUSH_LINES = 'index_flush_lines'
+INDEX_FLUSH_SECONDS = 'index_flush_seconds'
 PATH_TO_DOWNLOAD_LOCATION = 'default_download_location'
 VIDEO_ONLY = 'video_only'
 MAX_DOWNLOAD_SIZE = 'max_download_size'
+BANDWIDTH_LIMIT = 'bandwidth_limit'
+PLATFORM_BANDWIDTH_LIMITS = 'platform_bandwidth_limits'
 MAX_VIDEO_QUALITY = 'max_video_quality'
 MAX_AUDIO_QUALITY = 'max_audio_quality'
 ENCODING_STANDARD = 'encoding_standard'
 CRF = 'crf'
 USE_H265 = 'use_h265'
+CORE_BUDGET = 'core_budget'
+STREAM_COPY = 'stream_copy'
+MAX_COPY_VIDEO_BITRATE = 'max_copy_video_bitrate'
+SEGMENT_FROM_DURATION = 'segment_from_duration'
+SEGMENT_LENGTH = 'segment_length'
+CONCURRENT_DOWNLOADS = 'concurrent_downloads'
+MAX_FRAGMENT_DOWNLOADS = 'max_fragment_downloads'
+SKIP_ARCHIVED = 'skip_archived'
+PATH_TO_ARCHIVE_FILE = 'path_to_archive_file'
+SYNC_PLAYLISTS = 'sync_playlists'
+PATH_TO_PLAYLIST_SYNC_FILE = 'path_to_playlist_sync_file'
+STREAM_INTO_FFMPEG = 'stream_into_ffmpeg'
+PATH_TO_SCRATCH_LOCATION = 'scratch_directory'
+RENDITIONS = 'renditions'
+PATH_TO_JOURNAL_FILE = 'path_to_journal_file'
+METADATA_CACHE_SIZE = 'metadata_cache_size'
+METADATA_CACHE_TTL = 'metadata_cache_ttl'
+PATH_TO_METADATA_CACHE_FILE = 'path_to_metadata_cache_file'
+PREFETCH_WORKERS = 'prefetch_workers'
+PLAN_WINDOW = 'plan_window'
+JOB_ORDER = 'job_order'
+MIN_FREE_SPACE = 'min_free_space'
+WRITE_METRICS = 'write_metrics'
+WRITE_PROMETHEUS_FILE = 'write_prometheus_file'
+PROMETHEUS_PORT = 'prometheus_port'
+PATH_TO_METRICS_FILE = 'path_to_metrics_file'
+PATH_TO_PROMETHEUS_FILE = 'path_to_prometheus_file'
 
 config_keys = [
     INDEX_FILE_NAME,
+    INDEX_STORE_FILE_NAME,
+    PATH_TO_INDEX_STORE_FILE,
     PATH_TO_INDEX_FILE,
     INDEXING_FORMAT,
+    INDEX_FLUSH_LINES,
+    INDEX_FLUSH_SECONDS,
     PATH_TO_DOWNLOAD_LOCATION,
     VIDEO_ONLY,
     MAX_DOWNLOAD_SIZE,
+    BANDWIDTH_LIMIT,
+    PLATFORM_BANDWIDTH_LIMITS,
     MAX_VIDEO_QUALITY,
     MAX_AUDIO_QUALITY,
     ENCODING_STANDARD,
     CRF,
     USE_H265,
+    CORE_BUDGET,
+    STREAM_COPY,
+    MAX_COPY_VIDEO_BITRATE,
+    SEGMENT_FROM_DURATION,
+    SEGMENT_LENGTH,
+    CONCURRENT_DOWNLOADS,
+    MAX_FRAGMENT_DOWNLOADS,
+    SKIP_ARCHIVED,
+    PATH_TO_ARCHIVE_FILE,
+    SYNC_PLAYLISTS,
+    PATH_TO_PLAYLIST_SYNC_FILE,
+    STREAM_INTO_FFMPEG,
+    PATH_TO_SCRATCH_LOCATION,
+    RENDITIONS,
+    PATH_TO_JOURNAL_FILE,
+    METADATA_CACHE_SIZE,
+    METADATA_CACHE_TTL,
+    PATH_TO_METADATA_CACHE_FILE,
+    PREFETCH_WORKERS,
+    PLAN_WINDOW,
+    JOB_ORDER,
+    MIN_FREE_SPACE,
+    WRITE_METRICS,
+    WRITE_PROMETHEUS_FILE,
+    PROMETHEUS_PORT,
+    PATH_TO_METRICS_FILE,
+    PATH_TO_PROMETHEUS_FILE,
 ]
 
 
@@ -86,12 +160,63 @@ def get_audio_format_mapping_str() -> str:
     return base
 
 
-def import_config() -> dict[str, str | bool | None]:
-    downloader_config: dict[str, str | bool | None] = dict.fromkeys(config_keys, None)
+def get_config_file_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", CONF_FILE_NAME)
+
+
+def read_bandwidth_limits(config) -> tuple[int, dict[str, int]]:
+    bandwidth_limit = config['downloading']['bandwidth_limit']
+    platform_bandwidth_limits = {key[:-len('_bandwidth_limit')]: value for key, value in config['downloading'].items() if key.endswith('_bandwidth_limit')}
+    if not bandwidth_limit.isdigit(): raise ValueError("bandwidth_limit must be a non-negative integer.")
+    for platform, limit in platform_bandwidth_limits.items():
+        if not limit.isdigit(): raise ValueError(f"Bandwidth limit for {platform} must be a non-negative integer.")
+    return int(bandwidth_limit) * 1024, {platform: int(limit) * 1024 for platform, limit in platform_bandwidth_limits.items()}
+
+
+def import_bandwidth_limits() -> tuple[int, dict[str, int]] | None:
+    import configparser
+    config = configparser.ConfigParser()
+    try:
+        config.read(get_config_file_path())
+        return read_bandwidth_limits(config)
+    except (configparser.Error, KeyError, ValueError):
+        return None
+
+
+def read_rendition(name: str, section, max_video_quality: str) -> dict[str, str | bool | None]:
+    rendition_video_quality = section['max_video_quality']
+    rendition_audio_quality = section['max_audio_quality']
+    rendition_encoding_standard = section['encoding_standard']
+    rendition_crf = section['crf']
+    rendition_use_h265 = section['use_h265']
+    if not name or not is_valid_indexing_file(name): raise ValueError(f"Invalid rendition name '{name}'.")
+    if rendition_video_quality not in allowed_video_formats: raise ValueError(
+        f"Invalid max video quality for rendition {name}. Must be one of the following: {", ".join(allowed_video_formats)}.")
+    if rendition_video_quality != '-1' and max_video_quality == '-1': raise ValueError(
+        f"Rendition {name} needs video, but max_video_quality is -1 (audio only).")
+    if rendition_audio_quality not in allowed_audio_format: raise ValueError(
+        f"Invalid max audio quality for rendition {name}. Must be one of the following: {", ".join(allowed_audio_format)}.")
+    if rendition_encoding_standard not in allowed_encoding_standards: raise ValueError(
+        f"Invalid encoding standard for rendition {name}. Must be one of the following: {", ".join(allowed_encoding_standards)}.")
+    if rendition_crf not in allowed_crf_standards: raise ValueError(
+        f"Invalid CRF standard for rendition {name}. Must be one of the following: {", ".join(allowed_crf_standards)}.")
+    if rendition_use_h265 != 'true' and rendition_use_h265 != 'false': raise ValueError(
+        f"use_h265 for rendition {name} must be either 'true' or 'false'.")
+    return {
+        MAX_VIDEO_QUALITY: video_format_to_quality[rendition_video_quality],
+        MAX_AUDIO_QUALITY: audio_format_to_quality[rendition_audio_quality],
+        ENCODING_STANDARD: encoding_standard_to_preset[rendition_encoding_standard],
+        CRF: crf_standard_to_value[rendition_crf],
+        USE_H265: True if rendition_use_h265 == 'true' else False,
+    }
+
+
+def import_config() -> dict[str, str | bool | int | dict[str, int] | None]:
+    downloader_config: dict[str, str | bool | int | dict[str, int] | None] = dict.fromkeys(config_keys, None)
     import configparser
     config = configparser.ConfigParser()
     try:
-        config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", CONF_FILE_NAME))
+        config.read(get_config_file_path())
         if len(config) == 0:
             raise FileNotFoundError("Configuration file does not exist or cannot be opened.")
         if not config.sections():
@@ -102,14 +227,42 @@ def import_config() -> dict[str, str | bool | None]:
             )
         index_file_name = os.path.normpath(config['indexing']['index_file_name'])
         indexing_format = config['indexing']['indexing_format']
+        index_flush_lines = config['indexing']['index_flush_lines']
+        index_flush_seconds = config['indexing']['index_flush_seconds']
         default_download_location = config['indexing']['default_download_location']
         video_only = config['downloading']['video_only']
         max_size = config['downloading']['max_download_size']
         max_video_quality = config['downloading']['max_video_quality']
         max_audio_quality = config['downloading']['max_audio_quality']
+        skip_archived = config['downloading']['skip_archived']
+        sync_playlists = config['downloading']['sync_playlists']
+        stream_into_ffmpeg = config['downloading']['stream_into_ffmpeg']
+        scratch_directory = config['downloading']['scratch_directory']
+        bandwidth_limit, platform_bandwidth_limits = read_bandwidth_limits(config)
         encoding_standard = config['encoding']['encoding_standard']
         crf = config['encoding']['crf']
         use_h265 = config['encoding']['use_h265']
+        core_budget = config['encoding']['core_budget']
+        stream_copy = config['encoding']['stream_copy']
+        max_copy_video_bitrate = config['encoding']['max_copy_video_bitrate']
+        segment_from_minutes = config['encoding']['segment_from_minutes']
+        segment_length = config['encoding']['segment_length_seconds']
+        concurrent_downloads = {key: value for key, value in config['concurrency'].items() if not key.endswith('_fragments')}
+        max_fragment_downloads = {key[:-len('_fragments')]: value for key, value in config['concurrency'].items() if key.endswith('_fragments')}
+        metadata_cache_size = config['metadata_cache']['max_size_mb']
+        prefetch_workers = config['planning']['prefetch_workers']
+        plan_window = config['planning']['plan_window']
+        job_order = config['planning']['job_order']
+        min_free_space = config['planning']['min_free_space_mb']
+        write_metrics = config['metrics']['write_metrics']
+        write_prometheus_file = config['metrics']['write_prometheus_file']
+        prometheus_port = config['metrics']['prometheus_port']
+        metadata_cache_ttl = {key[:-len('_ttl')]: value for key, value in config['metadata_cache'].items() if key.endswith('_ttl')}
+        renditions: dict[str, dict[str, str | bool | None]] = {}
+        for section_name in config.sections():
+            if section_name.startswith(RENDITION_SECTION_PREFIX):
+                rendition_name = section_name[len(RENDITION_SECTION_PREFIX):].strip()
+                renditions[rendition_name] = read_rendition(rendition_name, config[section_name], max_video_quality)
         if max_video_quality not in allowed_video_formats: raise ValueError(
             f"Invalid max video quality. Must be one of the following: {", ".join(allowed_video_formats)}. Number to quality mapping: {get_video_format_mapping_str()}")
         if max_audio_quality not in allowed_audio_format: raise ValueError(
@@ -121,20 +274,83 @@ def import_config() -> dict[str, str | bool | None]:
         if video_only != 'true' and video_only != 'false': raise ValueError(
             "video_only must be either 'true' or 'false'.")
         if use_h265 != 'true' and use_h265 != 'false': raise ValueError("use_h265 must be either 'true' or 'false'.")
+        if skip_archived != 'true' and skip_archived != 'false': raise ValueError(
+            "skip_archived must be either 'true' or 'false'.")
+        if sync_playlists != 'true' and sync_playlists != 'false': raise ValueError(
+            "sync_playlists must be either 'true' or 'false'.")
+        if stream_into_ffmpeg != 'true' and stream_into_ffmpeg != 'false': raise ValueError(
+            "stream_into_ffmpeg must be either 'true' or 'false'.")
+        if not core_budget.isdigit(): raise ValueError("core_budget must be a non-negative integer.")
+        if stream_copy != 'true' and stream_copy != 'false': raise ValueError(
+            "stream_copy must be either 'true' or 'false'.")
+        if not max_copy_video_bitrate.isdigit(): raise ValueError("max_copy_video_bitrate must be a non-negative integer.")
+        if not segment_from_minutes.isdigit(): raise ValueError("segment_from_minutes must be a non-negative integer.")
+        if not segment_length.isdigit() or segment_length == '0': raise ValueError(
+            "segment_length_seconds must be a positive integer.")
+        for platform, limit in concurrent_downloads.items():
+            if not limit.isdigit() or limit == '0': raise ValueError(
+                f"Concurrency limit for {platform} must be a positive integer.")
+        for platform, limit in max_fragment_downloads.items():
+            if not limit.isdigit() or limit == '0': raise ValueError(
+                f"Fragment limit for {platform} must be a positive integer.")
+        if not metadata_cache_size.isdigit(): raise ValueError("max_size_mb must be a non-negative integer.")
+        for platform, ttl in metadata_cache_ttl.items():
+            if not ttl.isdigit(): raise ValueError(f"Metadata cache lifetime for {platform} must be a non-negative integer.")
+        if not prefetch_workers.isdigit(): raise ValueError("prefetch_workers must be a non-negative integer.")
+        if not plan_window.isdigit() or plan_window == '0': raise ValueError("plan_window must be a positive integer.")
+        if job_order not in allowed_job_orders: raise ValueError(
+            f"Invalid job order. Must be one of the following: {", ".join(allowed_job_orders)}.")
+        if not min_free_space.isdigit(): raise ValueError("min_free_space_mb must be a non-negative integer.")
+        if write_metrics != 'true' and write_metrics != 'false': raise ValueError(
+            "write_metrics must be either 'true' or 'false'.")
+        if write_prometheus_file != 'true' and write_prometheus_file != 'false': raise ValueError(
+            "write_prometheus_file must be either 'true' or 'false'.")
+        if not prometheus_port.isdigit() or int(prometheus_port) > 65535: raise ValueError(
+            "prometheus_port must be a port number or 0.")
+        if not index_flush_lines.isdigit() or index_flush_lines == '0': raise ValueError(
+            "index_flush_lines must be a positive integer.")
+        if not index_flush_seconds.isdigit(): raise ValueError("index_flush_seconds must be a non-negative integer.")
         if not is_valid_indexing_file(index_file_name):
             raise ValueError("Invalid indexing file name.")
         if default_download_location != "none":
             downloader_config[PATH_TO_DOWNLOAD_LOCATION] = os.path.normpath(default_download_location)
         downloader_config[INDEX_FILE_NAME] = f'{index_file_name}.txt'
+        downloader_config[INDEX_STORE_FILE_NAME] = f'{index_file_name}.db'
         downloader_config[INDEXING_FORMAT] = indexing_format
+        downloader_config[INDEX_FLUSH_LINES] = int(index_flush_lines)
+        downloader_config[INDEX_FLUSH_SECONDS] = int(index_flush_seconds)
         downloader_config[VIDEO_ONLY] = True if video_only == 'true' else False
         if max_size != '-1':
             downloader_config[MAX_DOWNLOAD_SIZE] = max_size
         downloader_config[MAX_VIDEO_QUALITY] = video_format_to_quality[max_video_quality]
         downloader_config[MAX_AUDIO_QUALITY] = audio_format_to_quality[max_audio_quality]
+        downloader_config[SKIP_ARCHIVED] = True if skip_archived == 'true' else False
+        downloader_config[SYNC_PLAYLISTS] = True if sync_playlists == 'true' else False
+        downloader_config[RENDITIONS] = renditions
+        downloader_config[STREAM_INTO_FFMPEG] = True if stream_into_ffmpeg == 'true' else False
+        if scratch_directory != "none":
+            downloader_config[PATH_TO_SCRATCH_LOCATION] = os.path.normpath(scratch_directory)
+        downloader_config[BANDWIDTH_LIMIT] = bandwidth_limit
+        downloader_config[PLATFORM_BANDWIDTH_LIMITS] = platform_bandwidth_limits
         downloader_config[ENCODING_STANDARD] = encoding_standard_to_preset[encoding_standard]
         downloader_config[CRF] = crf_standard_to_value[crf]
         downloader_config[USE_H265] = True if use_h265 == 'true' else False
+        downloader_config[CORE_BUDGET] = int(core_budget) if core_budget != '0' else (os.cpu_count() or 1)
+        downloader_config[STREAM_COPY] = True if stream_copy == 'true' else False
+        downloader_config[MAX_COPY_VIDEO_BITRATE] = int(max_copy_video_bitrate)
+        downloader_config[SEGMENT_FROM_DURATION] = int(segment_from_minutes) * 60
+        downloader_config[SEGMENT_LENGTH] = int(segment_length)
+        downloader_config[CONCURRENT_DOWNLOADS] = {platform: int(limit) for platform, limit in concurrent_downloads.items()}
+        downloader_config[MAX_FRAGMENT_DOWNLOADS] = {platform: int(limit) for platform, limit in max_fragment_downloads.items()}
+        downloader_config[METADATA_CACHE_SIZE] = int(metadata_cache_size) * 1024 * 1024
+        downloader_config[METADATA_CACHE_TTL] = {platform: int(ttl) for platform, ttl in metadata_cache_ttl.items()}
+        downloader_config[PREFETCH_WORKERS] = int(prefetch_workers)
+        downloader_config[WRITE_METRICS] = True if write_metrics == 'true' else False
+        downloader_config[WRITE_PROMETHEUS_FILE] = True if write_prometheus_file == 'true' else False
+        downloader_config[PROMETHEUS_PORT] = int(prometheus_port)
+        downloader_config[PLAN_WINDOW] = int(plan_window)
+        downloader_config[JOB_ORDER] = job_order
+        downloader_config[MIN_FREE_SPACE] = int(min_free_space) * 1024 * 1024
         return downloader_config
     except FileNotFoundError:
         MessageHandler.error(f"Error: Configuration file '{CONF_FILE_NAME}' not found!")
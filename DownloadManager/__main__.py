@@ -1,33 +1,64 @@
 #!/usr/bin/env python3
+import argparse
+import itertools
 import os
+import queue
 import sys
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from DownloadManager.message_handler import MessageHandler
-from DownloadManager.downloaders.downloaders import create_downloaders, BaseDownloader, match_url_to_platform, Indexer
-from DownloadManager import PATH_TO_DOWNLOAD_LOCATION, PATH_TO_INDEX_FILE, INDEX_FILE_NAME, INDEXING_FORMAT
+from DownloadManager.downloaders.downloaders import create_downloaders, BaseDownloader, Indexer
+from DownloadManager.downloaders.routing import UrlRouter
+from DownloadManager.downloaders.pipeline import DownloadPipeline
+from DownloadManager.downloaders.transcoding import create_rendition_profile
+from DownloadManager.downloaders.archive import DownloadArchive, open_archive
+from DownloadManager.downloaders.playlist_sync import PlaylistSyncStore, open_playlist_sync
+from DownloadManager.downloaders.journal import JobJournal, open_journal, JOB_QUEUED
+from DownloadManager.downloaders.index_store import IndexStore, open_index_store, import_index_file
+from DownloadManager.downloaders.metadata_cache import MetadataCache, open_metadata_cache
+from DownloadManager.downloaders.bandwidth import BandwidthLimiter
+from DownloadManager.downloaders.fragments import FragmentConcurrencyController
+from DownloadManager.downloaders.metrics import MetricsRecorder
+from DownloadManager.ingestion import read_url_lines, route_url, route_urls, STDIN_SOURCE
+from DownloadManager.service import DownloadService, EventBroadcaster, JobRegistry, run_service
+from DownloadManager.planner import DiskBudget, DownloadPlanner
+from DownloadManager import PATH_TO_DOWNLOAD_LOCATION, PATH_TO_INDEX_FILE, INDEX_FILE_NAME, INDEXING_FORMAT, \
+    ARCHIVE_FILE_NAME, PATH_TO_ARCHIVE_FILE, SKIP_ARCHIVED, PLAYLIST_SYNC_FILE_NAME, PATH_TO_PLAYLIST_SYNC_FILE, \
+    SYNC_PLAYLISTS, JOURNAL_FILE_NAME, PATH_TO_JOURNAL_FILE, \
+    INDEX_STORE_FILE_NAME, PATH_TO_INDEX_STORE_FILE, METADATA_CACHE_FILE_NAME, PATH_TO_METADATA_CACHE_FILE, \
+    METADATA_CACHE_SIZE, METADATA_CACHE_TTL, METRICS_FILE_NAME, PROMETHEUS_FILE_NAME, WRITE_METRICS, \
+    WRITE_PROMETHEUS_FILE, PROMETHEUS_PORT, PATH_TO_METRICS_FILE, PATH_TO_PROMETHEUS_FILE, PATH_TO_SCRATCH_LOCATION
+
+URL_QUEUE_SIZE = 1000
+SERVICE_PORT = 8765
 
 
 def task_finished_hook(d):
+    MessageHandler.progress(d)
     if d['status'] == 'finished':
         MessageHandler.success('Done downloading a stream, now downloading the next one or converting and compressing, may take a while...\n')
 
 
-def set_up(downloader_config: dict[str, str | bool | None]):
+def set_up(downloader_config: dict[str, str | bool | int | dict[str, int] | None], save_path: str | None = None):
     default_save_path = downloader_config[PATH_TO_DOWNLOAD_LOCATION]
-    if default_save_path is not None:
-        MessageHandler.info(
-            f"Detected default save location: {default_save_path}. If you wish to change it, enter the new path below. Otherwise, leave the line empty.")
-    user_input = MessageHandler.receive_input("Enter the path to the save directory: ")
-    if user_input == "" and default_save_path is not None:
-        MessageHandler.info("Using default save location")
-        norm_path = default_save_path
+    if save_path is not None:
+        norm_path = os.path.normpath(save_path)
     else:
-        norm_path = os.path.normpath(user_input)
+        if default_save_path is not None:
+            MessageHandler.info(
+                f"Detected default save location: {default_save_path}. If you wish to change it, enter the new path below. Otherwise, leave the line empty.")
+        user_input = MessageHandler.receive_input("Enter the path to the save directory: ")
+        if user_input == "" and default_save_path is not None:
+            MessageHandler.info("Using default save location")
+            norm_path = default_save_path
+        else:
+            norm_path = os.path.normpath(user_input)
+    downloader_config[PATH_TO_DOWNLOAD_LOCATION] = norm_path
     if not os.path.exists(norm_path):
         MessageHandler.info("Directory doesn't exist. Creating directory...")
         try:
             os.makedirs(norm_path)
-            downloader_config[PATH_TO_DOWNLOAD_LOCATION] = norm_path
             MessageHandler.info("Directory created successfully.")
         except PermissionError:
             MessageHandler.error("Permission denied: Cannot create directory for file saving.")
@@ -54,6 +85,25 @@ def set_up(downloader_config: dict[str, str | bool | None]):
     else:
         downloader_config[PATH_TO_INDEX_FILE] = path_to_index_file
         MessageHandler.info("Indexing file already exists. Will append to the end of it.")
+    path_to_scratch_location = downloader_config[PATH_TO_SCRATCH_LOCATION]
+    if path_to_scratch_location is not None and not os.path.exists(path_to_scratch_location):
+        try:
+            os.makedirs(path_to_scratch_location)
+            MessageHandler.info("Scratch directory created successfully.")
+        except OSError as e:
+            MessageHandler.error(f"Cannot create the scratch directory. Videos will be saved to the save directory before conversion. Details: {e}")
+            downloader_config[PATH_TO_SCRATCH_LOCATION] = None
+    if downloader_config[SKIP_ARCHIVED]:
+        downloader_config[PATH_TO_ARCHIVE_FILE] = os.path.join(norm_path, ARCHIVE_FILE_NAME)
+    if downloader_config[SYNC_PLAYLISTS]:
+        downloader_config[PATH_TO_PLAYLIST_SYNC_FILE] = os.path.join(norm_path, PLAYLIST_SYNC_FILE_NAME)
+    downloader_config[PATH_TO_JOURNAL_FILE] = os.path.join(norm_path, JOURNAL_FILE_NAME)
+    downloader_config[PATH_TO_INDEX_STORE_FILE] = os.path.join(norm_path, downloader_config[INDEX_STORE_FILE_NAME])
+    downloader_config[PATH_TO_METADATA_CACHE_FILE] = os.path.join(norm_path, METADATA_CACHE_FILE_NAME)
+    if downloader_config[WRITE_METRICS]:
+        downloader_config[PATH_TO_METRICS_FILE] = os.path.join(norm_path, METRICS_FILE_NAME)
+    if downloader_config[WRITE_PROMETHEUS_FILE]:
+        downloader_config[PATH_TO_PROMETHEUS_FILE] = os.path.join(norm_path, PROMETHEUS_FILE_NAME)
 
 
 def collect_urls(downloaders: dict[str, BaseDownloader]) -> tuple[dict[str, list[tuple[str, str, bool]]], int]:
@@ -62,6 +112,7 @@ def collect_urls(downloaders: dict[str, BaseDownloader]) -> tuple[dict[str, list
         MessageHandler.info(f"Platform {downloader.platform} -> URL schemes: '{'; '.join(downloader.get_sample_urls())}'")
     MessageHandler.info(f"Total platforms registered {len(downloaders)}\n")
     MessageHandler.info("Enter video or playlist urls to download one by one. Empty line to finish.")
+    router = UrlRouter(downloaders)
     downloader_to_urls: dict[str, list[tuple[str, str, bool]]] = {}
     registered_url_count: int = 0
     while True:
@@ -72,47 +123,134 @@ def collect_urls(downloaders: dict[str, BaseDownloader]) -> tuple[dict[str, list
                 MessageHandler.info("No URLs registered. Exiting...")
                 sys.exit(1)
             return downloader_to_urls, registered_url_count
-        match_result: str | None = match_url_to_platform(user_input)
+        match_result, sanitation_result = router.route(user_input.strip())
         if match_result is not None:
-            downloader = downloaders.get(match_result, None)
-            if downloader is None:
-                MessageHandler.error("No downloader registered for the chosen platform. Skipping...")
+            if sanitation_result is None:
+                MessageHandler.error(
+                    f"Malformed URL - matches {match_result} but does not meet requirements. Skipping...")
             else:
-                sanitation_result: tuple[str, str, bool] | None = downloader.sanitize_url(user_input)
-                if sanitation_result is None:
-                    MessageHandler.error(
-                        f"Malformed URL - matches {match_result} but does not meet requirements. Skipping...")
+                downloader_to_urls.setdefault(match_result, []).append(sanitation_result)
+                registered_url_count += 1
+                if sanitation_result[2]:
+                    MessageHandler.info(f"Registered URL for {match_result} and for playlist {sanitation_result[1]}. URLs registered: {registered_url_count}.")
+                    MessageHandler.info("Playlist has been registered. If you wish to download just the chosen video, please paste the URL of the video instead of the playlist.")
+                    if MessageHandler.receive_input("Type 'cancel' to remove the playlist url. Empty line or any other input to confirm.").lower() == "cancel":
+                        downloader_to_urls[match_result].pop()
+                        MessageHandler.info("Playlist url removed.")
+                        registered_url_count -= 1
                 else:
-                    downloader_to_urls.setdefault(match_result, []).append(sanitation_result)
-                    registered_url_count += 1
-                    if sanitation_result[2]:
-                        MessageHandler.info(f"Registered URL for {match_result} and for playlist {sanitation_result[1]}. URLs registered: {registered_url_count}.")
-                        MessageHandler.info("Playlist has been registered. If you wish to download just the chosen video, please paste the URL of the video instead of the playlist.")
-                        if MessageHandler.receive_input("Type 'cancel' to remove the playlist url. Empty line or any other input to confirm.").lower() == "cancel":
-                            downloader_to_urls[match_result].pop()
-                            MessageHandler.info("Playlist url removed.")
-                            registered_url_count -= 1
-                    else:
-                        MessageHandler.info(f"Registered URL for {match_result} and for video: {sanitation_result[1]}. URLs registered: {registered_url_count}.")
+                    MessageHandler.info(f"Registered URL for {match_result} and for video: {sanitation_result[1]}. URLs registered: {registered_url_count}.")
         else:
             MessageHandler.error("Invalid URL - does not match any registered domain. Skipping...")
 
 
-def main():
-    from DownloadManager import import_config, MAX_DOWNLOAD_SIZE, MAX_AUDIO_QUALITY, MAX_VIDEO_QUALITY, USE_H265, \
-        ENCODING_STANDARD, CRF, VIDEO_ONLY
-    MessageHandler.banner("Welcome to Download Manager.")
-    MessageHandler.banner("Please read README.md file for more information and before using this program.")
-    MessageHandler.info("Importing configuration file...\n")
-    downloader_config = import_config()
-    MessageHandler.success("Configuration imported successfully.\n")
-    set_up(downloader_config)
-    MessageHandler.success("Setup complete.\n")
-    MessageHandler.info("Creating downloader instances...\n")
-    downloaders: dict[str, BaseDownloader] = create_downloaders(
+def download_from_feed(downloaders: dict[str, BaseDownloader], pipeline: DownloadPipeline, url_feed: Iterable[tuple[str, tuple[str, str, bool]]]) -> tuple[dict[str, int], dict[str, int]]:
+    url_queues: dict[str, queue.Queue] = {}
+    futures: dict[str, Future] = {}
+    url_counts: dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=len(downloaders)) as executor:
+        try:
+            for key, url in url_feed:
+                if key not in url_queues:
+                    MessageHandler.info(f"Downloading and indexing entries for platform {downloaders[key].platform}...\n")
+                    url_queues[key] = queue.Queue(maxsize=URL_QUEUE_SIZE)
+                    futures[key] = executor.submit(downloaders[key].download_and_index, url_queues[key], pipeline)
+                pipeline.record_job(key, url, JOB_QUEUED)
+                url_queues[key].put(url)
+                url_counts[key] = url_counts.get(key, 0) + 1
+        finally:
+            for url_queue in url_queues.values():
+                url_queue.put(None)
+        download_success_counts = {key: futures[key].result() for key in futures}
+    return url_counts, download_success_counts
+
+
+def resume_unfinished_jobs(journal: JobJournal | None, url_feed: Iterable[tuple[str, tuple[str, str, bool]]]) -> Iterable[tuple[str, tuple[str, str, bool]]]:
+    if journal is None:
+        return url_feed
+    unfinished_jobs = journal.unfinished_jobs()
+    if not unfinished_jobs:
+        return url_feed
+    MessageHandler.alert(f"Found {len(unfinished_jobs)} unfinished entries from an interrupted run. They will be resumed first.")
+    unfinished_keys = {(key, url[1], url[2]) for key, url in unfinished_jobs}
+    return itertools.chain(
+        unfinished_jobs,
+        ((key, url) for key, url in url_feed if (key, url[1], url[2]) not in unfinished_keys))
+
+
+def open_pipeline(downloader_config: dict[str, str | bool | int | dict[str, int] | None], tracker=None) -> tuple[DownloadPipeline, list]:
+    from DownloadManager import CORE_BUDGET, INDEX_FLUSH_LINES, INDEX_FLUSH_SECONDS, PREFETCH_WORKERS, MIN_FREE_SPACE, \
+        STREAM_COPY, MAX_COPY_VIDEO_BITRATE, SEGMENT_FROM_DURATION, SEGMENT_LENGTH, BANDWIDTH_LIMIT, \
+        PLATFORM_BANDWIDTH_LIMITS, get_config_file_path, import_bandwidth_limits, MAX_FRAGMENT_DOWNLOADS, STREAM_INTO_FFMPEG
+    index_store: IndexStore | None = open_index_store(downloader_config[PATH_TO_INDEX_STORE_FILE])
+    indexer: Indexer = Indexer(
+        downloader_config[PATH_TO_INDEX_FILE],
+        downloader_config[INDEXING_FORMAT],
+        flush_every=downloader_config[INDEX_FLUSH_LINES],
+        flush_interval=downloader_config[INDEX_FLUSH_SECONDS],
+        store=index_store)
+    archive: DownloadArchive | None = None
+    if downloader_config[PATH_TO_ARCHIVE_FILE] is not None:
+        archive = open_archive(downloader_config[PATH_TO_ARCHIVE_FILE])
+    playlist_sync: PlaylistSyncStore | None = None
+    if downloader_config[PATH_TO_PLAYLIST_SYNC_FILE] is not None:
+        playlist_sync = open_playlist_sync(downloader_config[PATH_TO_PLAYLIST_SYNC_FILE])
+    journal: JobJournal | None = open_journal(downloader_config[PATH_TO_JOURNAL_FILE])
+    metadata_cache: MetadataCache | None = open_metadata_cache(
+        downloader_config[PATH_TO_METADATA_CACHE_FILE],
+        downloader_config[METADATA_CACHE_SIZE],
+        downloader_config[METADATA_CACHE_TTL])
+    disk_budget: DiskBudget | None = None
+    if downloader_config[PREFETCH_WORKERS] > 0 and tracker is None:
+        disk_budget = DiskBudget(downloader_config[PATH_TO_DOWNLOAD_LOCATION], downloader_config[MIN_FREE_SPACE])
+    metrics: MetricsRecorder | None = None
+    if downloader_config[PATH_TO_METRICS_FILE] is not None or downloader_config[PATH_TO_PROMETHEUS_FILE] is not None or downloader_config[PROMETHEUS_PORT] > 0:
+        metrics = MetricsRecorder(
+            downloader_config[PATH_TO_METRICS_FILE],
+            downloader_config[PATH_TO_PROMETHEUS_FILE],
+            downloader_config[PROMETHEUS_PORT])
+    bandwidth_limiter = BandwidthLimiter(
+        downloader_config[BANDWIDTH_LIMIT],
+        downloader_config[PLATFORM_BANDWIDTH_LIMITS],
+        get_config_file_path(),
+        import_bandwidth_limits)
+    pipeline = DownloadPipeline(
+        indexer,
+        downloader_config[CORE_BUDGET],
+        archive,
+        journal,
+        metadata_cache,
+        disk_budget,
+        bandwidth_limiter,
+        FragmentConcurrencyController(downloader_config[MAX_FRAGMENT_DOWNLOADS]),
+        metrics,
+        tracker,
+        playlist_sync,
+        downloader_config[STREAM_COPY],
+        downloader_config[MAX_COPY_VIDEO_BITRATE],
+        downloader_config[SEGMENT_FROM_DURATION],
+        downloader_config[SEGMENT_LENGTH],
+        downloader_config[STREAM_INTO_FFMPEG],
+        downloader_config[PATH_TO_DOWNLOAD_LOCATION])
+    return pipeline, [resource for resource in (indexer, index_store, archive, playlist_sync, journal, metadata_cache, metrics) if resource is not None]
+
+
+def close_resources(resources: list):
+    for resource in resources:
+        resource.close()
+
+
+def create_configured_downloaders(downloader_config: dict[str, str | bool | int | dict[str, int] | None], progress_hook) -> dict[str, BaseDownloader]:
+    from DownloadManager import MAX_DOWNLOAD_SIZE, MAX_AUDIO_QUALITY, MAX_VIDEO_QUALITY, USE_H265, ENCODING_STANDARD, CRF, \
+        VIDEO_ONLY, CONCURRENT_DOWNLOADS, RENDITIONS
+    renditions = {
+        name: create_rendition_profile(rendition[MAX_VIDEO_QUALITY], rendition[MAX_AUDIO_QUALITY], rendition[CRF], rendition[ENCODING_STANDARD], rendition[USE_H265])
+        for name, rendition in downloader_config[RENDITIONS].items()
+    }
+    return create_downloaders(
         False,
         MessageHandler,
-        task_finished_hook,
+        progress_hook,
         downloader_config[VIDEO_ONLY],
         downloader_config[CRF],
         downloader_config[ENCODING_STANDARD],
@@ -120,24 +258,191 @@ def main():
         downloader_config[MAX_VIDEO_QUALITY],
         downloader_config[MAX_AUDIO_QUALITY],
         downloader_config[MAX_DOWNLOAD_SIZE],
-        downloader_config[PATH_TO_DOWNLOAD_LOCATION]
+        downloader_config[PATH_TO_DOWNLOAD_LOCATION],
+        downloader_config[CONCURRENT_DOWNLOADS],
+        downloader_config[PATH_TO_SCRATCH_LOCATION],
+        renditions
     )
-    downloader_to_urls, url_count = collect_urls(downloaders)
-    MessageHandler.success(f"Collecting URLs complete. {url_count} collected.\n")
+
+
+def serve(arguments: argparse.Namespace, downloader_config: dict[str, str | bool | int | dict[str, int] | None]):
+    set_up(downloader_config, get_non_interactive_save_path(arguments, downloader_config))
+    registry = JobRegistry(EventBroadcaster())
+
+    def service_progress_hook(d):
+        task_finished_hook(d)
+        registry.progress_hook(d)
+
+    downloaders = create_configured_downloaders(downloader_config, service_progress_hook)
+    pipeline, resources = open_pipeline(downloader_config, registry)
+    service = DownloadService(downloaders, pipeline, registry)
+    MessageHandler.start_log_sink()
+    pipeline.start()
+    if pipeline.journal is not None:
+        unfinished_jobs = pipeline.journal.unfinished_jobs()
+        if unfinished_jobs:
+            MessageHandler.alert(f"Found {len(unfinished_jobs)} unfinished entries from an interrupted run. They are resumed as job 1.")
+            service.submit_urls(unfinished_jobs, [])
+    run_service(service, arguments.port)
+    index_success_counts = pipeline.finish()
+    MessageHandler.stop_log_sink()
+    close_resources(resources)
+    MessageHandler.success(f"Download service stopped. Indexed {sum(index_success_counts.values())} entries.")
+
+
+def get_non_interactive_save_path(arguments: argparse.Namespace, downloader_config: dict[str, str | bool | int | dict[str, int] | None]) -> str:
+    save_path = arguments.save_dir if arguments.save_dir is not None else downloader_config[PATH_TO_DOWNLOAD_LOCATION]
+    if save_path is None:
+        MessageHandler.error("This mode requires --save-dir or default_download_location in the configuration file.")
+        sys.exit(1)
+    return os.path.normpath(save_path)
+
+
+def search_index(arguments: argparse.Namespace, downloader_config: dict[str, str | bool | int | dict[str, int] | None]):
+    path_to_store_file = os.path.join(get_non_interactive_save_path(arguments, downloader_config), downloader_config[INDEX_STORE_FILE_NAME])
+    if not os.path.exists(path_to_store_file):
+        MessageHandler.error(f"Searchable index {path_to_store_file} does not exist. Download something or import an index file first.")
+        sys.exit(1)
+    store: IndexStore | None = open_index_store(path_to_store_file)
+    if store is None:
+        sys.exit(1)
+    results = store.search(" ".join(arguments.text), arguments.artist, arguments.platform, arguments.date, arguments.playlist, arguments.limit)
+    store.close()
+    for date, platform, url, title, artists, playlist_title, path_to_file in results:
+        playlist_part = f" - Playlist: {playlist_title}" if playlist_title else ""
+        file_part = f" - File: {path_to_file}" if path_to_file else ""
+        MessageHandler.info(f"{date}: {platform or 'Unknown'}: {url} - {title} - Created by: {artists}{playlist_part}{file_part}")
+    MessageHandler.success(f"Found {len(results)} entries.")
+
+
+def import_index(arguments: argparse.Namespace, downloader_config: dict[str, str | bool | int | dict[str, int] | None]):
+    path_to_store_file = os.path.join(get_non_interactive_save_path(arguments, downloader_config), downloader_config[INDEX_STORE_FILE_NAME])
+    store: IndexStore | None = open_index_store(path_to_store_file)
+    if store is None:
+        sys.exit(1)
+    indexing_format = arguments.format if arguments.format is not None else downloader_config[INDEXING_FORMAT]
+    for path_to_index_file in arguments.index_files:
+        MessageHandler.info(f"Importing index file {path_to_index_file}...")
+        try:
+            imported_count, skipped_count = import_index_file(store, path_to_index_file, indexing_format)
+            MessageHandler.success(f"Imported {imported_count} entries from {path_to_index_file}. Lines not matching the indexing format: {skipped_count}.")
+        except FileNotFoundError:
+            MessageHandler.error(f"Index file {path_to_index_file} does not exist. Skipping...")
+        except OSError as e:
+            MessageHandler.error(f"OS-related error occurred while reading {path_to_index_file}: {e}. Skipping...")
+    store.close()
+
+
+def check_urls(arguments: argparse.Namespace, downloader_config: dict[str, str | bool | int | dict[str, int] | None]):
+    if downloader_config[PATH_TO_DOWNLOAD_LOCATION] is None:
+        downloader_config[PATH_TO_DOWNLOAD_LOCATION] = os.curdir
+    router = UrlRouter(create_configured_downloaders(downloader_config, task_finished_hook))
+    valid_count = 0
+    invalid_count = 0
+    for line in read_url_lines(arguments.sources):
+        route_result = route_url(line, router)
+        if route_result is None:
+            invalid_count += 1
+            continue
+        match_result, sanitation_result = route_result
+        kind = "playlist" if sanitation_result[2] else "video"
+        MessageHandler.info(f"{match_result} {kind} {sanitation_result[1]}: {sanitation_result[0]}")
+        valid_count += 1
+    MessageHandler.success(f"Configuration is valid. {valid_count} URLs can be downloaded, {invalid_count} were rejected.")
+    if invalid_count > 0:
+        sys.exit(1)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="DownloadManager", description="Video downloader and indexer.")
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="SOURCE",
+        help=f"run without prompts, reading URLs line by line from the given files, directories of files or '{STDIN_SOURCE}' for standard input")
+    parser.add_argument(
+        "--save-dir",
+        help="save directory for batch mode, search and import, defaults to default_download_location from the configuration file")
+    commands = parser.add_subparsers(dest="command")
+    search_parser = commands.add_parser("search", help="search the download history")
+    search_parser.add_argument("text", nargs="*", help="words to look for in titles, artists and playlist titles")
+    search_parser.add_argument("--artist", help="exact artist name")
+    search_parser.add_argument("--platform", help="platform name, like Youtube")
+    search_parser.add_argument("--date", help="download date in ISO format (YYYY-MM-DD)")
+    search_parser.add_argument("--playlist", help="playlist URL or exact playlist title")
+    search_parser.add_argument("--limit", type=int, default=50, help="maximum number of results, newest first")
+    import_parser = commands.add_parser("import-index", help="add entries from existing index text files to the search history")
+    import_parser.add_argument("index_files", nargs="+", metavar="INDEX_FILE")
+    import_parser.add_argument("--format", help="indexing format the files were written with, defaults to the configured one")
+    serve_parser = commands.add_parser("serve", help="keep running and accept download jobs over a local HTTP API")
+    serve_parser.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port on 127.0.0.1 to listen on, {SERVICE_PORT} by default")
+    check_parser = commands.add_parser("check", help="validate the configuration file and the given URLs without downloading anything")
+    check_parser.add_argument(
+        "sources",
+        nargs="*",
+        metavar="SOURCE",
+        help=f"files, directories of files or '{STDIN_SOURCE}' for standard input with URLs to check line by line")
+    return parser.parse_args()
+
+
+def main():
+    from DownloadManager import import_config, MAX_DOWNLOAD_SIZE, PREFETCH_WORKERS, PLAN_WINDOW, JOB_ORDER
+    arguments = parse_arguments()
+    if arguments.command == "search":
+        search_index(arguments, import_config())
+        return
+    if arguments.command == "import-index":
+        import_index(arguments, import_config())
+        return
+    if arguments.command == "check":
+        check_urls(arguments, import_config())
+        return
+    if arguments.command == "serve":
+        serve(arguments, import_config())
+        return
+    MessageHandler.banner("Welcome to Download Manager.")
+    MessageHandler.banner("Please read README.md file for more information and before using this program.")
+    MessageHandler.info("Importing configuration file...\n")
+    downloader_config = import_config()
+    MessageHandler.success("Configuration imported successfully.\n")
+    if arguments.batch is not None:
+        set_up(downloader_config, get_non_interactive_save_path(arguments, downloader_config))
+    else:
+        set_up(downloader_config)
+    MessageHandler.success("Setup complete.\n")
+    MessageHandler.info("Creating downloader instances...\n")
+    downloaders: dict[str, BaseDownloader] = create_configured_downloaders(downloader_config, task_finished_hook)
+    if arguments.batch is not None:
+        url_feed = route_urls(read_url_lines(arguments.batch), UrlRouter(downloaders))
+    else:
+        downloader_to_urls, url_count = collect_urls(downloaders)
+        MessageHandler.success(f"Collecting URLs complete. {url_count} collected.\n")
+        url_feed = ((key, url) for key in downloader_to_urls for url in downloader_to_urls[key])
     MessageHandler.info("Starting downloading and indexing...\n")
-    indexer: Indexer = Indexer(downloader_config[PATH_TO_INDEX_FILE], downloader_config[INDEXING_FORMAT])
-    total_download_success = 0
-    total_index_success = 0
-    for key in downloader_to_urls:
-        current_downloader = downloaders[key]
-        MessageHandler.info(f"Downloading and indexing entries for platform {current_downloader.platform}...\n")
-        download_success_count, index_success_count = current_downloader.download_and_index(downloader_to_urls[key],indexer)
-        total_download_success += download_success_count
-        total_index_success += index_success_count
+    MessageHandler.start_log_sink()
+    pipeline, resources = open_pipeline(downloader_config)
+    url_feed = resume_unfinished_jobs(pipeline.journal, url_feed)
+    if pipeline.disk_budget is not None:
+        planner = DownloadPlanner(
+            downloaders,
+            pipeline,
+            pipeline.disk_budget,
+            downloader_config[PREFETCH_WORKERS],
+            downloader_config[PLAN_WINDOW],
+            downloader_config[JOB_ORDER],
+            downloader_config[MAX_DOWNLOAD_SIZE])
+        url_feed = planner.plan(url_feed)
+    pipeline.start()
+    url_counts, download_success_counts = download_from_feed(downloaders, pipeline, url_feed)
+    MessageHandler.info("Downloading finished for all platforms. Waiting for the remaining conversions and indexing...\n")
+    index_success_counts = pipeline.finish()
+    MessageHandler.stop_log_sink()
+    close_resources(resources)
+    for key in url_counts:
         MessageHandler.success(
-            f"Downloading and indexing for {current_downloader.platform} complete - downloaded {download_success_count} and indexed {index_success_count} entries out of {len(downloader_to_urls[key])}.\n")
+            f"Downloading and indexing for {downloaders[key].platform} complete - downloaded {download_success_counts[key]} and indexed {index_success_counts.get(key, 0)} entries out of {url_counts[key]}.\n")
     MessageHandler.success(
-        f"Downloading finished for all platforms. Downloaded {total_download_success} and indexed {total_index_success} entries out of {url_count}")
+        f"Downloading finished for all platforms. Downloaded {sum(download_success_counts.values())} and indexed {sum(index_success_counts.values())} entries out of {sum(url_counts.values())}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+
+from DownloadManager.message_handler import MessageHandler
+
+
+class DownloadArchive:
+
+    def __init__(self, path_to_archive_file: str):
+        self.path_to_archive_file = path_to_archive_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_to_archive_file, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS downloads ("
+            "platform TEXT NOT NULL, "
+            "video_id TEXT NOT NULL, "
+            "PRIMARY KEY (platform, video_id)"
+            ") WITHOUT ROWID")
+
+    def contains(self, platform: str, video_id: str) -> bool:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT 1 FROM downloads WHERE platform = ? AND video_id = ?",
+                (platform, video_id)).fetchone() is not None
+
+    def add(self, platform: str, video_id: str):
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO downloads (platform, video_id) VALUES (?, ?)",
+                    (platform, video_id))
+        except sqlite3.Error as e:
+            MessageHandler.error(f"Failed to record {video_id} in the download archive: {e}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_archive(path_to_archive_file: str) -> DownloadArchive | None:
+    try:
+        return DownloadArchive(path_to_archive_file)
+    except sqlite3.Error as e:
+        MessageHandler.error(f"Failed to open the download archive. Already downloaded videos will not be skipped. Details: {e}")
+        return None
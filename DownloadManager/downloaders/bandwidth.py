@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from DownloadManager.message_handler import MessageHandler
+
+RELOAD_CHECK_SECONDS = 5.0
+
+
+class TokenBucket:
+    def __init__(self, rate: int):
+        self.rate = rate
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: int):
+        with self._lock:
+            self.rate = rate
+            self._tokens = min(self._tokens, float(rate))
+
+    def reserve(self, amount: int) -> float:
+        with self._lock:
+            if self.rate == 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, float(self.rate))
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class BandwidthLimiter:
+    def __init__(self,
+                 global_rate: int,
+                 platform_rates: dict[str, int],
+                 path_to_config_file: str | None = None,
+                 load_rates: Callable[[], tuple[int, dict[str, int]] | None] | None = None):
+        self._global_bucket = TokenBucket(global_rate)
+        self._platform_buckets: dict[str, TokenBucket] = {platform: TokenBucket(rate) for platform, rate in platform_rates.items()}
+        self._path_to_config_file = path_to_config_file
+        self._load_rates = load_rates
+        self._config_modified = self._modification_time()
+        self._next_reload_check = time.monotonic() + RELOAD_CHECK_SECONDS
+        self._downloaded_bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set_rates(self, global_rate: int, platform_rates: dict[str, int]):
+        with self._lock:
+            self._global_bucket.set_rate(global_rate)
+            for platform, rate in platform_rates.items():
+                bucket = self._platform_buckets.setdefault(platform, TokenBucket(rate))
+                bucket.set_rate(rate)
+            for platform, bucket in self._platform_buckets.items():
+                if platform not in platform_rates:
+                    bucket.set_rate(0)
+
+    def throttle(self, platform: str, amount: int):
+        self._reload_if_changed()
+        with self._lock:
+            platform_bucket = self._platform_buckets.get(platform.lower())
+        wait = self._global_bucket.reserve(amount)
+        if platform_bucket is not None:
+            wait = max(wait, platform_bucket.reserve(amount))
+        if wait > 0:
+            time.sleep(wait)
+
+    def progress_hook(self, platform: str) -> Callable[[dict], None]:
+        def hook(d: dict):
+            key = d.get('filename') or d.get('tmpfilename') or ''
+            if d['status'] != 'downloading':
+                with self._lock:
+                    self._downloaded_bytes.pop(key, None)
+                return
+            downloaded_bytes = d.get('downloaded_bytes') or 0
+            with self._lock:
+                previous_bytes = self._downloaded_bytes.get(key, 0)
+                self._downloaded_bytes[key] = downloaded_bytes
+            if downloaded_bytes > previous_bytes:
+                self.throttle(platform, downloaded_bytes - previous_bytes)
+        return hook
+
+    def _modification_time(self) -> float | None:
+        if self._path_to_config_file is None:
+            return None
+        try:
+            return os.path.getmtime(self._path_to_config_file)
+        except OSError:
+            return None
+
+    def _reload_if_changed(self):
+        if self._load_rates is None or time.monotonic() < self._next_reload_check:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_reload_check:
+                return
+            self._next_reload_check = time.monotonic() + RELOAD_CHECK_SECONDS
+            modified = self._modification_time()
+            if modified == self._config_modified:
+                return
+            self._config_modified = modified
+        rates = self._load_rates()
+        if rates is None:
+            MessageHandler.error("Bandwidth limits in the configuration file are invalid. Keeping the current limits.")
+            return
+        self.set_rates(*rates)
+        MessageHandler.info("Bandwidth limits reloaded from the configuration file.")
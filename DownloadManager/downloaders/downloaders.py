@@ -1,11 +1,58 @@
+import copy
 import datetime
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 import os
-
-import yt_dlp
-from yt_dlp import YoutubeDL
+import queue
+import re
+import sqlite3
+import threading
+import time
 
 from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.pipeline import DownloadPipeline, PlaylistRecord
+from DownloadManager.downloaders.journal import JOB_DOWNLOADING
+from DownloadManager.downloaders.index_store import IndexStore
+from DownloadManager.downloaders.metadata_cache import MetadataCache
+from DownloadManager.downloaders.playlist_sync import PlaylistSyncStore
+from DownloadManager.downloaders.transcoding import TranscodeProfile
+
+if TYPE_CHECKING:
+    from yt_dlp import YoutubeDL
+    from DownloadManager.downloaders.feeder import PipelineFeeder
+
+METADATA_MAX_REDIRECTS = 3
+YOUTUBE_VIDEO_PATTERN = re.compile(r'[0-9A-Za-z_-]{11}')
+YOUTUBE_PLAYLIST_PATTERN = re.compile(r'[0-9A-Za-z_-]+')
+YOUTUBE_MIX_PREFIX = 'RD'
+TWITCH_VIDEO_PATTERN = re.compile(r'[0-9]{10}')
+FLAT_ENTRY_KEYS = ('_type', 'ie_key', 'id', 'url', 'title', 'duration', 'uploader')
+PLAYLIST_CACHE_MAX_ENTRIES = 10000
+OUTPUT_TEMPLATE = "%(title)s.%(ext)s"
+
+
+def estimate_file_size(info: dict) -> int | None:
+    estimated_size = 0
+    for chosen_format in info.get('requested_formats') or [info]:
+        size = chosen_format.get('filesize') or chosen_format.get('filesize_approx')
+        if size is None and chosen_format.get('tbr') and info.get('duration'):
+            size = chosen_format['tbr'] * 1000 / 8 * info['duration']
+        if size is None:
+            return None
+        estimated_size += int(size)
+    return estimated_size
+
+def compact_entry(entry: dict | None) -> dict | None:
+    if entry is None or entry.get('_type') not in ('url', 'url_transparent'):
+        return entry
+    return {key: entry[key] for key in FLAT_ENTRY_KEYS if entry.get(key) is not None}
+
+INDEX_PLACEHOLDERS: dict[str, str] = {
+    '[URL]': 'url',
+    '[TITLE]': 'title',
+    '[PLATFORM]': 'platform',
+    '[ARTIST_LIST]': 'artist_list',
+}
 
 
 class Indexer:
@@ -13,26 +60,49 @@ class Indexer:
     def __init__(self,
              path_to_index_file: str,
              indexing_format: str,
-             chosen_date: str = None):
+             chosen_date: str = None,
+             flush_every: int = 1,
+             flush_interval: float = 0.0,
+             store: IndexStore = None):
         self.path_to_index_file = path_to_index_file
         self.indexing_format = indexing_format
         if chosen_date is not None: self.chosen_date = chosen_date
         else: self.chosen_date = str(datetime.date.today())
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.store = store
         self.is_open = False
         self.file = None
+        self._template = self._compile_format()
+        self._pending: list[str] = []
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._playlist_headers: dict[str, str] = {}
+        self._playlist_lines: dict[str, list[str]] = {}
+        self._tail_playlist_url: str | None = None
 
     def close_and_configure(self, path_to_index_file: str, indexing_format: str, chosen_date: str = None):
         self.close()
         self.path_to_index_file = path_to_index_file
         self.indexing_format = indexing_format
         if chosen_date is not None: self.chosen_date = chosen_date
+        self._template = self._compile_format()
+
+    def _compile_format(self) -> str:
+        template = (self.indexing_format
+                    .replace('{', '{{')
+                    .replace('}', '}}')
+                    .replace('[DATE]', self.chosen_date.replace('{', '{{').replace('}', '}}')))
+        for placeholder, field in INDEX_PLACEHOLDERS.items():
+            template = template.replace(placeholder, f'{{{field}}}')
+        return template + '\n'
 
     def open(self):
         if self.is_open:
             return
-        self.is_open = True
         try:
             self.file = open(self.path_to_index_file, 'a')
+            self.is_open = True
         except FileNotFoundError:
             MessageHandler.error("The file or directory does not exist.")
         except PermissionError:
@@ -46,18 +116,24 @@ class Indexer:
 
     def close(self):
         if self.is_open:
+            for playlist_url in list(self._playlist_headers):
+                self.close_playlist_block(playlist_url)
+            self.flush_if_due(force=True)
             self.file.close()
             self.is_open = False
             self.file = None
 
-    def append_playlist_to_index(self, playlist_url: str, playlist_title: str, entries: list[dict[str, str]], creators: list[str], platform: str) -> bool:
+    def append_playlist_entry_to_index(self, playlist_url: str, playlist_title: str, url: str, title: str, creator: str, platform: str, path_to_file: str = None) -> bool:
         if not self.is_open:
             self.open()
         try:
-            self.file.write(f"PLAYLIST: {platform}: {playlist_url} - {playlist_title}:\n")
-            for entry, creator in zip(entries, creators):
-                self._append_format(entry['url'], entry['title'], [creator], platform, True)
-            self.file.write("\n")
+            if playlist_url not in self._playlist_headers:
+                self._playlist_headers[playlist_url] = f"PLAYLIST: {platform}: {playlist_url} - {playlist_title}:\n"
+                self._playlist_lines[playlist_url] = []
+            self._playlist_lines[playlist_url].append(f"\t{self._format(url, title, [creator], platform)}")
+            self._count_pending(1)
+            self._store(url, title, [creator], platform, path_to_file, playlist_url, playlist_title)
+            MessageHandler.info(f"Indexed video: {title} in playlist {playlist_title}")
             return True
         except TypeError:
             MessageHandler.error("Invalid data type provided for writing.")
@@ -67,11 +143,13 @@ class Indexer:
             MessageHandler.error(f"OS-related error occurred: {e}")
         return False
 
-    def append_to_index(self, url: str, title: str, artist_list: list[str], platform: str) -> bool:
+    def append_to_index(self, url: str, title: str, artist_list: list[str], platform: str, path_to_file: str = None) -> bool:
         if not self.is_open:
             self.open()
         try:
-            self._append_format(url, title, artist_list, platform)
+            self._buffer(self._format(url, title, artist_list, platform), 1)
+            self._store(url, title, artist_list, platform, path_to_file)
+            MessageHandler.info(f"Indexed video: {title}")
             return True
         except TypeError:
             MessageHandler.error("Invalid data type provided for writing.")
@@ -81,19 +159,90 @@ class Indexer:
             MessageHandler.error(f"OS-related error occurred: {e}")
         return False
 
-    def _append_format(self, url: str, title: str, artist_list: list[str], platform: str, indent: bool = False):
-        formatted_index = (self.indexing_format
-                           .replace("[URL]", url)
-                           .replace("[TITLE]", title)
-                           .replace("[PLATFORM]", platform)
-                           .replace("[DATE]", self.chosen_date)
-                           .replace("[ARTIST_LIST]", ", ".join(artist_list)) + '\n')
-        MessageHandler.info(f"Indexing video: {title}...")
-        if indent:
-            self.file.write(f"\t{formatted_index}")
-        else:
-            self.file.write(formatted_index)
-        MessageHandler.info(f"Indexed video as: {formatted_index}")
+    def close_playlist_block(self, playlist_url: str):
+        if playlist_url not in self._playlist_headers:
+            return
+        header = self._playlist_headers.pop(playlist_url)
+        lines = self._playlist_lines.pop(playlist_url)
+        if playlist_url == self._tail_playlist_url:
+            self._pending.insert(0, ''.join(lines) + "\n")
+            self._tail_playlist_url = None
+        elif lines:
+            self._pending.append(header + ''.join(lines) + "\n")
+        try:
+            self._count_pending(0)
+        except PermissionError:
+            MessageHandler.error("Permission denied: Unable to write to the file.")
+        except OSError as e:
+            MessageHandler.error(f"OS-related error occurred: {e}")
+
+    def flush_if_due(self, force: bool = False) -> bool:
+        if not self._pending and self._pending_count == 0:
+            return True
+        if not force and self._pending_count < self.flush_every and time.monotonic() - self._last_flush < self.flush_interval:
+            return True
+        try:
+            self._flush()
+            return True
+        except PermissionError:
+            MessageHandler.error("Permission denied: Unable to write to the file.")
+        except OSError as e:
+            MessageHandler.error(f"OS-related error occurred: {e}")
+        return False
+
+    def _format(self, url: str, title: str, artist_list: list[str], platform: str) -> str:
+        return self._template.format(url=url, title=title, platform=platform, artist_list=", ".join(artist_list))
+
+    def _buffer(self, text: str, line_count: int):
+        self._pending.append(text)
+        self._count_pending(line_count)
+
+    def _count_pending(self, line_count: int):
+        if not self.is_open:
+            raise OSError("Index file is not open.")
+        self._pending_count += line_count
+        if self._pending_count >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def _store(self, url: str, title: str, artist_list: list[str], platform: str, path_to_file: str | None, playlist_url: str = None, playlist_title: str = None):
+        if self.store is None:
+            return
+        try:
+            self.store.add_entry(url, title, artist_list, platform, self.chosen_date, path_to_file, playlist_url, playlist_title)
+        except sqlite3.Error as e:
+            MessageHandler.error(f"Failed to add {title} to the searchable index: {e}")
+
+    def _flush(self):
+        chunks = []
+        tail_playlist_url = self._tail_playlist_url
+        if tail_playlist_url is not None:
+            chunks.extend(self._playlist_lines[tail_playlist_url])
+            if self._pending or any(lines for playlist_url, lines in self._playlist_lines.items() if playlist_url != tail_playlist_url):
+                chunks.append("\n")
+                tail_playlist_url = None
+        chunks.extend(self._pending)
+        for playlist_url, lines in self._playlist_lines.items():
+            if not lines or playlist_url == self._tail_playlist_url:
+                continue
+            if tail_playlist_url is not None:
+                chunks.append("\n")
+            chunks.append(self._playlist_headers[playlist_url])
+            chunks.extend(lines)
+            tail_playlist_url = playlist_url
+        self.file.write(''.join(chunks))
+        self._tail_playlist_url = tail_playlist_url
+        for lines in self._playlist_lines.values():
+            lines.clear()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if self.store is not None:
+            try:
+                self.store.commit()
+            except sqlite3.Error as e:
+                MessageHandler.error(f"Failed to save the searchable index: {e}")
+        self._pending.clear()
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
 
 class BaseDownloader(ABC):
     @property
@@ -124,7 +273,12 @@ class BaseDownloader(ABC):
                  max_video_quality: str | None,
                  max_audio_quality: str,
                  max_file_size: str | None,
-                 path_to_save_location: str):
+                 path_to_save_location: str,
+                 concurrent_downloads: int,
+                 path_to_scratch_location: str | None = None,
+                 renditions: dict[str, TranscodeProfile] | None = None,
+                 convert_downloads: bool = True):
+        self._concurrent_downloads = concurrent_downloads
         self._yt_dlp_options = {
             'verbose': should_log_everything,
             'playliststart': 1,
@@ -133,11 +287,16 @@ class BaseDownloader(ABC):
             'ignoreerrors': True,
             'fragment_retries': 5,
             'retries': 3,
+            'continuedl': True,
             'extract_flat': 'discard_in_playlist',
             'logger': logger,
+            'noprogress': True,
+            'lazy_playlist': True,
             'progress_hooks': [task_finished_hook],
+            'allowed_extractors': self.extractor_names,
         }
-        self._add_save_location(path_to_save_location)
+        self._transcode_profile: TranscodeProfile | None = None
+        self._add_save_location(path_to_save_location, path_to_scratch_location)
         if video_only:
             self._change_to_video_only_conversion_setup(use_h265, crf, encoding_standard)
         else:
@@ -147,47 +306,51 @@ class BaseDownloader(ABC):
                 self._change_to_default_conversion_setup(use_h265, crf, encoding_standard, max_audio_quality)
                 self._add_video_format_setup(max_video_quality)
         if max_file_size is not None: self._add_max_file_size_setup(max_file_size)
-        self._playlist_info_options = {
-            'playlist_items': '1',
-            'quiet': True,
-            'extract_flat': False
-        }
+        if renditions: self._transcode_profile.renditions = renditions
+        if not convert_downloads: self._transcode_profile = None
+
+    @property
+    @abstractmethod
+    def extractor_names(self) -> list[str]:
+        pass
 
     @abstractmethod
     def get_sample_urls(self) -> list[str]:
         pass
 
     @abstractmethod
-    def download_and_index(self, url_list: list[tuple[str, str, bool]], indexer) -> int:
+    def download_and_index(self, url_queue, pipeline) -> int:
         pass
 
-    def sanitize_url(self, url: str) -> tuple[str, str, bool] | None:
-        if len(url) > len(self.url_scheme) and url.startswith(self.url_scheme):
-            return self.trim_params_and_validate(url)
-        return None
+    @abstractmethod
+    def estimate_entry(self, cache, url: tuple[str, str, bool]) -> tuple[float | None, int | None] | None:
+        pass
 
-    @staticmethod
+    @property
     @abstractmethod
-    def validate_video_part(video_part: str) -> bool:
+    def url_routes(self) -> dict[str, str]:
         pass
 
-    @staticmethod
+    @property
+    def url_parameters(self) -> tuple[str | None, str | None]:
+        return None, None
+
     @abstractmethod
-    def validate_playlist(playlist_part: str) -> bool:
-       pass
+    def canonical_url(self, code: str, is_playlist: bool, video: str | None = None) -> str:
+        pass
 
     @staticmethod
     @abstractmethod
-    def get_video_part(url: str, scheme_length: int) -> tuple[str, int]:
+    def validate_video_part(video_part: str) -> bool:
         pass
 
     @staticmethod
     @abstractmethod
-    def get_video_and_playlist_parts(url: str, scheme_length: int) -> tuple[str, str, int]:
-        pass
+    def validate_playlist(playlist_part: str) -> bool:
+       pass
 
-    def _add_save_location(self, path_to_save_location: str):
-        self._yt_dlp_options['outtmpl'] = os.path.join(path_to_save_location, "%(title)s.%(ext)s")
+    def _add_save_location(self, path_to_save_location: str, path_to_scratch_location: str | None):
+        self._yt_dlp_options['outtmpl'] = os.path.join(path_to_scratch_location or path_to_save_location, OUTPUT_TEMPLATE)
 
     def _add_max_file_size_setup(self, max_file_size: str):
         self._yt_dlp_options['format'] = self._yt_dlp_options.get('format', '') + f'[filesize<={max_file_size}M]'
@@ -197,117 +360,225 @@ class BaseDownloader(ABC):
         pass
 
     def _change_to_default_conversion_setup(self, use_h265: bool, crf: str, encoding_standard: str, audio_format: str):
-        self._yt_dlp_options['postprocessors'] = [
-            {
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mkv',
-            }]
-        self._yt_dlp_options['postprocessor_args'] = [
-            '-c:v', ('libx264' if use_h265 is False else 'libx265'),
-            '-c:a', 'libopus',
-            '-crf', crf,
-            '-b:a', f'{audio_format}k',
-            '-preset', encoding_standard,
-        ]
+        self._transcode_profile = TranscodeProfile('mkv', 'libx264' if use_h265 is False else 'libx265', audio_format, crf, encoding_standard)
         self._yt_dlp_options['merge_output_format'] = 'mkv'
 
     def _change_to_audio_only_conversion_setup(self, audio_format: str):
-        self._yt_dlp_options['postprocessors'] = [
-            {
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'opus',
-                'preferredquality': f'{audio_format}',
-            }
-        ]
+        self._transcode_profile = TranscodeProfile('opus', None, audio_format)
         self._yt_dlp_options['format'] = 'bestaudio/best'
 
     def _change_to_video_only_conversion_setup(self, use_h265: bool, crf: str, encoding_standard: str):
-        self._yt_dlp_options['postprocessors'] = [
-            {
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mkv',
-            }]
-        self._yt_dlp_options['postprocessor_args'] = [
-            '-c:v', 'libx264' if use_h265 is False else 'libx265',
-            '-crf', crf,
-            '-preset', encoding_standard,
-            '-na'
-        ]
+        self._transcode_profile = TranscodeProfile('mkv', 'libx264' if use_h265 is False else 'libx265', None, crf, encoding_standard)
 
-    def trim_params_and_validate(self, url: str) -> tuple[str, str, bool] | None:
-        if self.is_playlist(url):
-            video_part, playlist_part, trim_index = self.get_video_and_playlist_parts(url, len(self.url_scheme))
-            if not self.validate_video_part(video_part): return None
-            if not self.validate_playlist(playlist_part): return None
-            if trim_index == -1:
-                return url, playlist_part, True
-            return url[:trim_index], playlist_part, True
+class EmbeddedVideoMetadataDownloader(BaseDownloader, ABC):
+    def download_and_index(self, url_queue: queue.Queue, pipeline: DownloadPipeline) -> int:
+        worker_count = self._concurrent_downloads
+        download_success_counts = [0] * worker_count
+        workers = [
+            threading.Thread(
+                target=self._download_worker,
+                args=(url_queue, pipeline, download_success_counts, i),
+                name=f"{self.platform}-download-{i}",
+                daemon=True)
+            for i in range(worker_count)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return sum(download_success_counts)
+
+    def _download_worker(self, url_queue: queue.Queue, pipeline: DownloadPipeline, download_success_counts: list[int], worker_index: int):
+        import yt_dlp
+        from DownloadManager.downloaders.feeder import PipelineFeeder, StreamingTranscoder, StreamingDownloaderChoice
+        worker_name = f"{self.platform}-download-{worker_index}"
+        feeder = PipelineFeeder(pipeline, self.platform, self._transcode_profile)
+        options = {**self._yt_dlp_options, 'match_filter': feeder.filter_entry}
+        if pipeline.bandwidth_limiter is not None:
+            options['progress_hooks'] = [*options['progress_hooks'], pipeline.bandwidth_limiter.progress_hook(self.platform)]
+        if pipeline.metrics is not None:
+            options['progress_hooks'] = [*options['progress_hooks'], pipeline.metrics.progress_hook(worker_name)]
+        if pipeline.fragment_controller is not None:
+            options['logger'] = pipeline.fragment_controller.observing_logger(options['logger'], self.platform)
+            options['concurrent_fragment_downloads'] = pipeline.fragment_controller.level(self.platform)
+        is_streamed = pipeline.stream_into_ffmpeg and self._transcode_profile is not None
+        downloader_choice = StreamingDownloaderChoice()
+        if is_streamed:
+            options['external_downloader'] = downloader_choice
+        with yt_dlp.YoutubeDL(options) as downloader:
+            downloader.add_post_processor(feeder, when='after_move')
+            if is_streamed:
+                downloader.add_post_processor(StreamingTranscoder(pipeline, self._transcode_profile, downloader_choice), when='video')
+            if pipeline.fragment_controller is not None:
+                downloader.add_progress_hook(pipeline.fragment_controller.progress_hook(self.platform, downloader.params))
+            while True:
+                url: tuple[str, str, bool] | None = url_queue.get()
+                if url is None:
+                    url_queue.put(None)
+                    return
+                is_downloaded = False
+                try:
+                    is_downloaded = self._download_url(downloader, feeder, pipeline, url, url_queue.qsize())
+                finally:
+                    pipeline.finish_download(self.platform, url, is_downloaded)
+                    if pipeline.metrics is not None:
+                        pipeline.metrics.discard_download_stats(worker_name)
+                if is_downloaded:
+                    download_success_counts[worker_index] += 1
+
+    def _download_url(self, downloader: 'YoutubeDL', feeder: 'PipelineFeeder', pipeline: DownloadPipeline, url: tuple[str, str, bool], count: int) -> bool:
+        if not url[2] and pipeline.is_archived(self.platform, url[1]):
+            MessageHandler.info(f"Video {url[1]} has already been downloaded before. Skipping... Items in queue for {self.platform} left: {count}.")
+            pipeline.finish_job(self.platform, url)
+            return False
+        pipeline.record_job(self.platform, url, JOB_DOWNLOADING)
+        if url[2]:
+            entry_info = self.fetch_entry_info(downloader, pipeline.metadata_cache, url, count, use_cache=pipeline.playlist_sync is None, lazy=True)
+            if entry_info is None:
+                pipeline.finish_job(self.platform, url)
+                return False
+            if pipeline.playlist_sync is not None:
+                self.select_new_entries(pipeline.playlist_sync, entry_info[0], url)
+            playlist_title = self.read_playlist_title(entry_info[0], url)
+            playlist = pipeline.open_playlist(self.platform, url[0], url[1], playlist_title)
+            is_downloaded = self.download_entry(downloader, feeder, pipeline.metadata_cache, url, entry_info, count, playlist)
+            pipeline.close_playlist(playlist)
+            return is_downloaded
+        feeder.url = url
+        feeder.playlist = None
+        is_downloaded = feeder.resume_entry(url[1])
+        if not is_downloaded:
+            started = time.monotonic()
+            entry_info = self.fetch_entry_info(downloader, pipeline.metadata_cache, url, count)
+            feeder.metadata_seconds = time.monotonic() - started
+            is_downloaded = entry_info is not None and self.download_entry(downloader, feeder, pipeline.metadata_cache, url, entry_info, count)
+            if not is_downloaded:
+                pipeline.finish_job(self.platform, url)
+        if is_downloaded:
+            MessageHandler.success(f"Downloaded entry {url[1]}. Items in queue for {self.platform} left: {count}.\n")
         else:
-            video_part, trim_index = self.get_video_part(url, len(self.url_scheme))
-            if not self.validate_video_part(video_part): return None
-            if trim_index == -1:
-                return url, video_part, True
-            return url[:trim_index], video_part, True
-
-    @abstractmethod
-    def is_playlist(self, url: str) -> bool:
-        pass
+            MessageHandler.error(f"Entry {url[1]} was not downloaded. Items in queue for {self.platform} left: {count}.\n")
+        return is_downloaded
+
+    def estimate_entry(self, cache: MetadataCache | None, url: tuple[str, str, bool]) -> tuple[float | None, int | None] | None:
+        import yt_dlp
+        with yt_dlp.YoutubeDL({**self._yt_dlp_options, 'quiet': True, 'noprogress': True, 'progress_hooks': []}) as downloader:
+            entry_info = self.fetch_entry_info(downloader, cache, url, 0)
+            if entry_info is None:
+                return None
+            ie_result = entry_info[0]
+            try:
+                info = downloader.process_ie_result(copy.deepcopy(ie_result), download=False)
+            except yt_dlp.DownloadError:
+                info = None
+            if info is None:
+                return ie_result.get('duration'), None
+            return info.get('duration'), estimate_file_size(info)
+
+    def _metadata_cache_key(self, url: tuple[str, str, bool]) -> str:
+        return f"{self.platform}:{'playlist' if url[2] else 'video'}:{url[1]}"
+
+    def fetch_entry_info(self, downloader: 'YoutubeDL', cache: MetadataCache | None, url: tuple[str, str, bool], count: int, use_cache: bool = True, lazy: bool = False) -> tuple[dict, bool] | None:
+        import yt_dlp
+        key = self._metadata_cache_key(url)
+        if cache is not None and use_cache:
+            ie_result = cache.get(self.platform, key)
+            if ie_result is not None:
+                MessageHandler.info(f"Using cached information for {url[1]}...")
+                return ie_result, True
+        MessageHandler.info(f"Downloading {'playlist ' if url[2] else ''}information {url[1]}...")
+        try:
+            ie_result = downloader.extract_info(url[0], download=False, process=False)
+            for _ in range(METADATA_MAX_REDIRECTS):
+                if ie_result is None or ie_result.get('_type') not in ('url', 'url_transparent'):
+                    break
+                ie_result = downloader.extract_info(ie_result['url'], download=False, process=False, ie_key=ie_result.get('ie_key'))
+            if ie_result is None: raise yt_dlp.DownloadError("Failed to fetch entry metadata")
+        except yt_dlp.DownloadError as e:
+            MessageHandler.error(f"Failed to fetch information for {url[1]}. Reason {e.msg}. Skipping... Items in queue left: {count}.\n")
+            return None
+        is_lazy = lazy and 'entries' in ie_result
+        entries = ie_result.pop('entries') if is_lazy else None
+        if 'entries' in ie_result:
+            ie_result['entries'] = [compact_entry(entry) for entry in ie_result['entries'] or []]
+        if is_lazy:
+            ie_result['entries'] = self._cache_when_enumerated(cache, key, ie_result, entries or [])
+        elif cache is not None:
+            cache.put(self.platform, key, self._cacheable_info(ie_result))
+        return ie_result, False
 
-class EmbeddedVideoMetadataDownloader(BaseDownloader, ABC):
-    def download_and_index(self, url_list: list[tuple[str, str, bool]], indexer: Indexer = None) -> tuple[int, int]:
-        download_success_count: int = 0
-        index_success_count: int = 0
-        count: int = len(url_list)
-        with yt_dlp.YoutubeDL(self._yt_dlp_options) as downloader:
-            for url in url_list:
-                count -= 1
-                if url[2]:
-                    with yt_dlp.YoutubeDL(self._playlist_info_options) as playlist_extractor:
-                        MessageHandler.info(f"Downloading playlist information {url[1]}...")
-                        try:
-                            playlist_info = playlist_extractor.extract_info(url[0], download=False)
-                            if playlist_info is None:
-                                MessageHandler.error(f"Failed to fetch playlist information for {url[1]}. Skipping entire playlist... Items in queue left: {count}.\n")
-                                continue
-                            playlist_title = playlist_info['title']
-                            playlist_count = playlist_info['playlist_count']
-                            MessageHandler.info(f"Playlist information fetched for {url[1]}. Playlist title: {playlist_title}. Videos in playlist: {playlist_count}.\n")
-                            if playlist_count > 30:
-                                MessageHandler.alert(f"Playlist {playlist_title} has {playlist_count} videos. All of them will be downloaded and converted.")
-                            playlist_entries = []
-                            downloaded_count, index_success_count = self.download_entry(downloader, url, index_success_count, download_success_count, count, playlist_entries)
-                            if downloaded_count != 0:
-                                download_success_count = downloaded_count
-                                MessageHandler.info(f"Indexing {len(playlist_entries)} videos in playlist {playlist_title}...")
-                                indexer.append_playlist_to_index(url[0], playlist_title, playlist_entries, [entry['uploader'] for entry in playlist_entries], self.platform)
-                        except yt_dlp.DownloadError as e:
-                            MessageHandler.error(f"Failed to fetch playlist information for {url[1]}. Reason {e.msg}. Skipping entire playlist... Items in queue left: {count}.\n")
+    @staticmethod
+    def _cacheable_info(ie_result: dict) -> dict:
+        import yt_dlp
+        return yt_dlp.YoutubeDL.sanitize_info({name: value for name, value in ie_result.items() if not name.startswith('__')})
+
+    def _cache_when_enumerated(self, cache: MetadataCache | None, key: str, ie_result: dict, entries):
+        enumerated_entries: list[dict | None] | None = [] if cache is not None else None
+        for entry in entries:
+            entry = compact_entry(entry)
+            if enumerated_entries is not None:
+                if len(enumerated_entries) < PLAYLIST_CACHE_MAX_ENTRIES:
+                    enumerated_entries.append(dict(entry) if entry is not None else None)
                 else:
-                    download_success_count, index_success_count = self.download_entry(downloader, url, index_success_count, download_success_count, count, None, indexer)
-                    MessageHandler.success(f"Success count: {download_success_count}D and {index_success_count}I of {len(url_list)} entries. Items in queue for {self.platform} left: {count}.\n")
-            return download_success_count, index_success_count
+                    enumerated_entries = None
+            yield entry
+        if enumerated_entries is not None:
+            cache.put(self.platform, key, self._cacheable_info({**ie_result, 'entries': enumerated_entries}))
 
-
-    def download_entry(self, downloader: YoutubeDL, url: tuple[str, str, bool], index_success_count: int, download_success_count: int, count: int, playlist_entries: list[str] =None, indexer: Indexer = None) -> tuple[int, int]:
+    @staticmethod
+    def read_playlist_title(ie_result: dict, url: tuple[str, str, bool]) -> str:
+        playlist_title = ie_result.get('title') or url[1]
+        entries = ie_result.get('entries')
+        playlist_count = ie_result.get('playlist_count') or (len(entries) if isinstance(entries, list) else None)
+        MessageHandler.info(f"Playlist information fetched for {url[1]}. Playlist title: {playlist_title}. Videos in playlist: {playlist_count or 'counted while downloading'}.\n")
+        download_count = len(entries) if isinstance(entries, list) else playlist_count
+        if download_count is not None and download_count > 30:
+            MessageHandler.alert(f"Playlist {playlist_title} has {download_count} videos to download. All of them will be downloaded and converted.")
+        return playlist_title
+
+    def select_new_entries(self, playlist_sync: PlaylistSyncStore, ie_result: dict, url: tuple[str, str, bool]):
+        seen_entries = playlist_sync.seen_entries(self.platform, url[1])
+        if not seen_entries:
+            return
+        entries = ie_result.get('entries') or []
+        if isinstance(entries, list):
+            ie_result['entries'] = [entry for entry in entries if entry is not None and entry.get('id') not in seen_entries]
+            MessageHandler.info(f"Playlist {url[1]} was synced before. {len(ie_result['entries'])} of its {len(entries)} videos are new.")
+        else:
+            ie_result['entries'] = (entry for entry in entries if entry is not None and entry.get('id') not in seen_entries)
+            MessageHandler.info(f"Playlist {url[1]} was synced before. {len(seen_entries)} known videos will be skipped.")
+
+    def download_entry(self, downloader: 'YoutubeDL', feeder: 'PipelineFeeder', cache: MetadataCache | None, url: tuple[str, str, bool], entry_info: tuple[dict, bool], count: int, playlist: PlaylistRecord = None) -> bool:
+        import yt_dlp
+        feeder.url = url
+        feeder.playlist = playlist
+        ie_result, is_cached = entry_info
         try:
             MessageHandler.info(f"Attempting to download entry: {url[1]}...")
-            info = downloader.extract_info(url[0], download=True)
-            if info is None: raise yt_dlp.DownloadError("Failed to fetch entry metadata")
-            download_success_count += 1
-            MessageHandler.info(f"Downloaded entry: {url[1]}")
-            title = info['title']
-            uploader = info['uploader']
-            if playlist_entries is None and indexer is not None:
-                if indexer.append_to_index(url[0], title, [uploader], self.platform):
-                    index_success_count += 1
-                    MessageHandler.success(f"Downloading and indexing for video {url[1]} complete. Remaining items in queue: {count}")
+            submitted_count = feeder.submitted_count
+            try:
+                info = downloader.process_ie_result(ie_result, download=True)
+                if info is None: raise yt_dlp.DownloadError("Failed to process entry metadata")
+                if playlist is None and feeder.submitted_count == submitted_count:
+                    raise yt_dlp.DownloadError("Cached entry metadata did not lead to a download" if is_cached else "The entry was not downloaded")
+            except yt_dlp.DownloadError:
+                if not is_cached: raise
+                MessageHandler.alert(f"Cached information for {url[1]} is stale. Fetching it again...")
+                cache.invalidate(self._metadata_cache_key(url))
+                entry_info = self.fetch_entry_info(downloader, cache, url, count, use_cache=False, lazy=url[2])
+                if entry_info is None: return False
+                info = downloader.process_ie_result(entry_info[0], download=True)
+                if info is None: raise yt_dlp.DownloadError("Failed to process entry metadata")
+                if playlist is None and feeder.submitted_count == submitted_count:
+                    raise yt_dlp.DownloadError("The entry was not downloaded")
+            if playlist is None:
+                MessageHandler.info(f"Downloaded entry: {url[1]}. Queued for conversion and indexing.")
             else:
-                playlist_entries.extend(info['entries'])
                 MessageHandler.success(f"Downloading playlist {url[1]} complete. Remaining items in queue: {count}")
+            return True
         except yt_dlp.DownloadError as e:
             MessageHandler.error(f"Failed to download video: {url[1]}. Reason: {e.msg}. Skipping... Remaining items in queue: {count}.\n")
-        finally:
-            return download_success_count, index_success_count
+            return False
 
     def _add_video_format_setup(self, video_format: str):
         self._yt_dlp_options['format'] = self._yt_dlp_options.get('format',
@@ -317,111 +588,101 @@ class YoutubeDownloader(EmbeddedVideoMetadataDownloader):
 
     @staticmethod
     def validate_playlist(playlist_part: str) -> bool:
-        for char in playlist_part:
-            code = ord(char)
-            if (48 <= code <= 57) or (65 <= code <= 90) or (97 <= code <= 122) or code == 45 or code == 95:
-                continue
-            else:
-                return False
-        return True
+        return YOUTUBE_PLAYLIST_PATTERN.fullmatch(playlist_part) is not None
 
     @staticmethod
     def validate_video_part(video_part: str) -> bool:
-        if len(video_part) != 11: return False
-        for char in video_part:
-            code = ord(char)
-            if (48 <= code <= 57) or (65 <= code <= 90) or (97 <= code <= 122) or code == 45 or code == 95:
-                continue
-            else:
-                return False
-        return True
-
-    @staticmethod
-    def get_video_part(url: str, scheme_length: int) -> tuple[str, int]:
-        next_param_index = url.find('&', scheme_length+1)
-        if next_param_index == -1:
-            return url[scheme_length:], -1
-        return url[scheme_length:next_param_index], next_param_index
-
-    @staticmethod
-    def get_video_and_playlist_parts(url: str, scheme_length: int) -> tuple[str, str, int]:
-        first_param_index = url.find('&', scheme_length+1)
-        next_param_index = url.find('&', first_param_index+1)
-        return url[scheme_length:first_param_index], url[first_param_index+6:next_param_index], next_param_index
+        return YOUTUBE_VIDEO_PATTERN.fullmatch(video_part) is not None
 
     @property
     def url_scheme(self):
         return 'https://www.youtube.com/watch?v='
 
+    @property
+    def url_routes(self) -> dict[str, str]:
+        watch_routes = r'/(?:watch|playlist)/?|/(?:shorts|live|embed|v|e)/(?P<video>[^/]+)/?'
+        return {
+            'youtube.com': watch_routes,
+            'm.youtube.com': watch_routes,
+            'music.youtube.com': watch_routes,
+            'youtube-nocookie.com': r'/embed/(?P<video>[^/]+)/?',
+            'youtu.be': r'/(?P<video>[^/]+)/?',
+        }
+
+    @property
+    def url_parameters(self) -> tuple[str | None, str | None]:
+        return 'v', 'list'
+
+    def canonical_url(self, code: str, is_playlist: bool, video: str | None = None) -> str:
+        if not is_playlist:
+            return f'{self.url_scheme}{code}'
+        if code.startswith(YOUTUBE_MIX_PREFIX):
+            seed_video = video or code[len(YOUTUBE_MIX_PREFIX):]
+            if self.validate_video_part(seed_video):
+                return f'{self.url_scheme}{seed_video}&list={code}'
+        return f'https://www.youtube.com/playlist?list={code}'
+
     @property
     def platform(self):
         return YOUTUBE_KEY
 
+    @property
+    def extractor_names(self) -> list[str]:
+        return ['youtube', 'youtube:tab']
+
     def get_sample_urls(self) -> list[str]:
         return [
             f'{self.url_scheme}[VIDEO_CODE]',
-            f'{self.url_scheme}[VIDEO_CODE]&list=[PLAYLIST_CODE]'
+            'https://youtu.be/[VIDEO_CODE]',
+            'https://www.youtube.com/shorts/[VIDEO_CODE]',
+            f'{self.url_scheme}[VIDEO_CODE]&list=[PLAYLIST_CODE]',
+            'https://www.youtube.com/playlist?list=[PLAYLIST_CODE]'
         ]
 
-    def is_playlist(self, url: str) -> bool:
-        return '&list=' in url[len(self.url_scheme):]
-
 class TwitchDownloader(EmbeddedVideoMetadataDownloader):
 
     @staticmethod
     def validate_video_part(video_part: str) -> bool:
-        if len(video_part) != 10: return False
-        for char in video_part:
-            if 48 <= ord(char) <= 57:
-                continue
-            else:
-                return False
-        return True
+        return TWITCH_VIDEO_PATTERN.fullmatch(video_part) is not None
 
     @staticmethod
     def validate_playlist(playlist_part: str) -> bool:
         raise Exception("Twitch does not support playlists")
 
-    @staticmethod
-    def get_video_part(url: str, scheme_length: int) -> tuple[str, int]:
-        next_param_index = min(url.find('/', scheme_length+1), url.find('?', scheme_length+1))
-        if next_param_index == -1:
-            return url[scheme_length:], -1
-        return url[scheme_length:next_param_index], next_param_index
-
-    @staticmethod
-    def get_video_and_playlist_parts(url: str, scheme_length: int) -> tuple[str, str, int]:
-        raise Exception("Twitch does not support playlists")
-
     @property
     def url_scheme(self):
         return 'https://www.twitch.tv/videos/'
 
+    @property
+    def url_routes(self) -> dict[str, str]:
+        video_routes = r'/(?:videos|[^/]+/v)/(?P<video>[^/]+)/?'
+        return {
+            'twitch.tv': video_routes,
+            'm.twitch.tv': video_routes,
+        }
+
+    def canonical_url(self, code: str, is_playlist: bool, video: str | None = None) -> str:
+        return f'{self.url_scheme}{code}'
+
     @property
     def platform(self):
         return TWITCH_KEY
 
-    def get_sample_urls(self) -> list[str]:
-        return [f'{self.url_scheme}[VIDEO_CODE]']
+    @property
+    def extractor_names(self) -> list[str]:
+        return ['twitch:vod']
 
-    def is_playlist(self, url: str) -> bool:
-        return False
+    def get_sample_urls(self) -> list[str]:
+        return [
+            f'{self.url_scheme}[VIDEO_CODE]',
+            'https://www.twitch.tv/[CHANNEL]/v/[VIDEO_CODE]'
+        ]
 
 YOUTUBE_KEY = 'Youtube'
 YOUTUBE_MATCH = 'youtube'
 TWITCH_KEY = 'Twitch'
 TWITCH_MATCH = 'twitch'
 
-def match_url_to_platform(url: str) -> str | None:
-    if (len(url)) < 12: return None
-    sub_ulr = url[12:] #https://www.
-    if sub_ulr.startswith(YOUTUBE_MATCH):
-            return YOUTUBE_KEY
-    elif sub_ulr.startswith(TWITCH_MATCH):
-            return TWITCH_KEY
-    return None
-
-
 def create_downloaders(should_log_everything: bool,
                        logger,
                        task_finished_hook,
@@ -432,7 +693,10 @@ def create_downloaders(should_log_everything: bool,
                        max_video_quality: str | None,
                        max_audio_quality: str,
                        max_file_size: str | None,
-                       path_to_save_location: str) -> dict[str, BaseDownloader]:
+                       path_to_save_location: str,
+                       concurrent_downloads: dict[str, int],
+                       path_to_scratch_location: str | None = None,
+                       renditions: dict[str, TranscodeProfile] | None = None) -> dict[str, BaseDownloader]:
     return {
         YOUTUBE_KEY:
             YoutubeDownloader(
@@ -445,8 +709,11 @@ def create_downloaders(should_log_everything: bool,
                 use_h265,
                 max_video_quality,
                 max_audio_quality,
-               max_file_size,
-                path_to_save_location),
+                max_file_size,
+                path_to_save_location,
+                concurrent_downloads.get(YOUTUBE_MATCH, 1),
+                path_to_scratch_location,
+                renditions),
         TWITCH_KEY:
             TwitchDownloader(
                 should_log_everything,
@@ -459,5 +726,8 @@ def create_downloaders(should_log_everything: bool,
                 max_video_quality,
                 max_audio_quality,
                 max_file_size,
-                path_to_save_location)
+                path_to_save_location,
+                concurrent_downloads.get(TWITCH_MATCH, 1),
+                path_to_scratch_location,
+                renditions)
     }
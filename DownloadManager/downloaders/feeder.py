@@ -0,0 +1,122 @@
+import os
+
+from yt_dlp.downloader.external import FFmpegFD
+from yt_dlp.postprocessor import PostProcessor
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.pipeline import DownloadPipeline, PipelineJob, PlaylistRecord
+from DownloadManager.downloaders.journal import ENTRY_DOWNLOADED, ENTRY_TRANSCODED
+from DownloadManager.downloaders.transcoding import TranscodeProfile, media_from_formats
+
+STREAMABLE_PROTOCOLS = ('http', 'https')
+STREAMING_DOWNLOADERS = {'http': 'ffmpeg'}
+STREAMED_INFO_KEY = '__streamed_into_ffmpeg'
+
+
+class PipelineFeeder(PostProcessor):
+    def __init__(self, pipeline: DownloadPipeline, platform: str, transcode_profile: TranscodeProfile | None):
+        super().__init__()
+        self._pipeline = pipeline
+        self._platform = platform
+        self._transcode_profile = transcode_profile
+        self.url: tuple[str, str, bool] | None = None
+        self.playlist: PlaylistRecord | None = None
+        self.metadata_seconds: float | None = None
+        self.submitted_count = 0
+
+    def run(self, info):
+        if self.playlist is None:
+            url, code = self.url[0], self.url[1]
+        else:
+            url, code = info.get('webpage_url', self.url[0]), info.get('id', self.url[1])
+        is_streamed = info.get(STREAMED_INFO_KEY, False)
+        job = PipelineJob(
+            self._platform,
+            url,
+            code,
+            info['title'],
+            info.get('uploader') or 'Unknown',
+            self._name_streamed_file(info['filepath']) if is_streamed else info['filepath'],
+            self._transcode_profile,
+            self.playlist)
+        job.is_transcoded = is_streamed
+        self._pipeline.attach_metrics(job, info.get('id'), self.metadata_seconds if self.playlist is None else None)
+        self._pipeline.record_entry(job, ENTRY_TRANSCODED if is_streamed else ENTRY_DOWNLOADED)
+        self._pipeline.submit(job)
+        self.submitted_count += 1
+        return [], info
+
+    def _name_streamed_file(self, path_to_file: str) -> str:
+        path_to_output = f"{os.path.splitext(path_to_file)[0]}.{self._transcode_profile.output_extension}"
+        if path_to_output == path_to_file:
+            return path_to_file
+        try:
+            os.replace(path_to_file, path_to_output)
+        except OSError as e:
+            MessageHandler.error(f"Failed to rename the converted file {path_to_file}: {e}")
+            return path_to_file
+        return path_to_output
+
+    def filter_entry(self, info, *, incomplete) -> str | None:
+        if self.playlist is None or incomplete is not True:
+            return None
+        code = info.get('id')
+        if self._pipeline.is_archived(self._platform, code):
+            self._pipeline.record_playlist_entry(self.playlist, code)
+            return f"Video {code} has already been downloaded before"
+        if self.resume_entry(code):
+            return f"Video {code} has already been downloaded by an interrupted run"
+        return None
+
+    def resume_entry(self, code: str) -> bool:
+        recovered = self._pipeline.recover_entry(self._platform, code)
+        if recovered is None:
+            return False
+        url, title, uploader, path_to_file, state = recovered
+        job = PipelineJob(
+            self._platform,
+            url,
+            code,
+            title,
+            uploader,
+            path_to_file,
+            self._transcode_profile,
+            self.playlist)
+        job.is_transcoded = state == ENTRY_TRANSCODED
+        self._pipeline.attach_metrics(job)
+        MessageHandler.info(f"Resuming {title} from the previous run, already {state}...")
+        self._pipeline.submit(job)
+        return True
+
+
+class StreamingDownloaderChoice(dict):
+    def select(self, is_streamed: bool):
+        self.clear()
+        if is_streamed:
+            self.update(STREAMING_DOWNLOADERS)
+
+
+class StreamingTranscoder(PostProcessor):
+    def __init__(self, pipeline: DownloadPipeline, transcode_profile: TranscodeProfile, downloader_choice: StreamingDownloaderChoice):
+        super().__init__()
+        self._pipeline = pipeline
+        self._transcode_profile = transcode_profile
+        self._downloader_choice = downloader_choice
+
+    def run(self, info):
+        stream_args = self._stream_args(info)
+        self._downloader_choice.select(stream_args is not None)
+        if stream_args is None:
+            return [], info
+        info['downloader_options'] = {**(info.get('downloader_options') or {}), 'ffmpeg_args_out': stream_args}
+        info[STREAMED_INFO_KEY] = True
+        MessageHandler.info(f"Remuxing {info.get('title')} while downloading...")
+        return [], info
+
+    def _stream_args(self, info) -> list[str] | None:
+        formats = info.get('requested_formats') or [info]
+        if info.get('is_live') or any(chosen_format.get('protocol') not in STREAMABLE_PROTOCOLS for chosen_format in formats):
+            return None
+        if not FFmpegFD.available():
+            return None
+        return self._pipeline.stream_args(self._transcode_profile, media_from_formats(formats, info.get('duration')))
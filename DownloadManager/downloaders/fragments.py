@@ -0,0 +1,100 @@
+import threading
+from collections.abc import Callable
+
+RETRY_MARKER = 'Retrying'
+THROTTLED_MARKER = '429'
+MAX_ERROR_RATIO = 0.05
+THROUGHPUT_TOLERANCE = 0.9
+
+
+class ObservingLogger:
+    def __init__(self, logger, controller: 'FragmentConcurrencyController', platform: str):
+        self._logger = logger
+        self._controller = controller
+        self._platform = platform
+
+    def debug(self, msg):
+        self._logger.debug(msg)
+
+    def info(self, msg):
+        self._logger.info(msg)
+
+    def warning(self, msg):
+        self._controller.report_warning(self._platform, msg)
+        self._logger.warning(msg)
+
+    def error(self, msg):
+        self._logger.error(msg)
+
+
+class PlatformFragmentState:
+    def __init__(self, max_level: int):
+        self.max_level = max_level
+        self.level = max(1, max_level // 2)
+        self.best_throughput = 0.0
+        self.best_level = self.level
+        self.retry_count = 0
+        self.is_throttled = False
+
+
+class FragmentConcurrencyController:
+    def __init__(self, max_fragment_downloads: dict[str, int]):
+        self._states: dict[str, PlatformFragmentState] = {
+            platform: PlatformFragmentState(max_level) for platform, max_level in max_fragment_downloads.items()
+        }
+        self._downloads: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def level(self, platform: str) -> int:
+        state = self._states.get(platform.lower())
+        return 1 if state is None else state.level
+
+    def observing_logger(self, logger, platform: str) -> 'ObservingLogger':
+        return ObservingLogger(logger, self, platform)
+
+    def report_warning(self, platform: str, msg: str):
+        if RETRY_MARKER not in msg:
+            return
+        state = self._states.get(platform.lower())
+        if state is None:
+            return
+        with self._lock:
+            state.retry_count += 1
+            if THROTTLED_MARKER in msg:
+                state.is_throttled = True
+
+    def progress_hook(self, platform: str, params: dict) -> Callable[[dict], None]:
+        state = self._states.get(platform.lower())
+
+        def hook(d: dict):
+            if state is None:
+                return
+            key = d.get('filename') or d.get('tmpfilename') or ''
+            if d['status'] == 'downloading':
+                if d.get('fragment_count'):
+                    with self._lock:
+                        self._downloads[key] = d['fragment_count']
+                return
+            with self._lock:
+                fragment_count = self._downloads.pop(key, None)
+            if d['status'] == 'finished' and fragment_count is not None and d.get('elapsed'):
+                downloaded_bytes = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                self._adjust(state, downloaded_bytes / d['elapsed'], fragment_count)
+            params['concurrent_fragment_downloads'] = state.level
+
+        return hook
+
+    def _adjust(self, state: PlatformFragmentState, throughput: float, fragment_count: int):
+        with self._lock:
+            if state.is_throttled or state.retry_count > fragment_count * MAX_ERROR_RATIO:
+                state.level = max(1, state.level // 2)
+                state.best_throughput = 0.0
+            elif throughput >= state.best_throughput * THROUGHPUT_TOLERANCE:
+                if throughput > state.best_throughput:
+                    state.best_throughput = throughput
+                    state.best_level = state.level
+                state.level = min(state.max_level, state.level + 1)
+            else:
+                state.level = max(1, min(state.level - 1, state.best_level))
+            state.retry_count = 0
+            state.is_throttled = False
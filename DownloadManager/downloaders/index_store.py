@@ -0,0 +1,181 @@
+import re
+import sqlite3
+import threading
+
+from DownloadManager.message_handler import MessageHandler
+
+PLAYLIST_HEADER_PATTERN = re.compile(r'^PLAYLIST: (?P<platform>[^:]*): (?P<url>\S+) - (?P<title>.*):$')
+LINE_PLACEHOLDERS: dict[str, str] = {
+    '[URL]': r'(?P<url>\S+)',
+    '[TITLE]': r'(?P<title>.*?)',
+    '[PLATFORM]': r'(?P<platform>.*?)',
+    '[DATE]': r'(?P<date>\d{4}-\d{2}-\d{2})',
+    '[ARTIST_LIST]': r'(?P<artists>.*?)',
+}
+
+
+class IndexStore:
+
+    def __init__(self, path_to_store_file: str):
+        self.path_to_store_file = path_to_store_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_to_store_file, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id INTEGER PRIMARY KEY, "
+            "url TEXT NOT NULL, "
+            "title TEXT NOT NULL, "
+            "artists TEXT NOT NULL, "
+            "platform TEXT, "
+            "date TEXT, "
+            "playlist_url TEXT, "
+            "playlist_title TEXT, "
+            "path_to_file TEXT"
+            ")")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entry_artists ("
+            "entry_id INTEGER NOT NULL REFERENCES entries (id), "
+            "artist TEXT NOT NULL COLLATE NOCASE"
+            ")")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_url ON entries (url)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_platform ON entries (platform COLLATE NOCASE)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_date ON entries (date)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_playlist_url ON entries (playlist_url)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_playlist_title ON entries (playlist_title COLLATE NOCASE)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entry_artists_artist ON entry_artists (artist)")
+        self.has_full_text_search = self._create_full_text_table()
+        self._connection.commit()
+
+    def _create_full_text_table(self) -> bool:
+        try:
+            self._connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5("
+                "title, artists, playlist_title, content='entries', content_rowid='id')")
+            return True
+        except sqlite3.OperationalError:
+            MessageHandler.alert("SQLite full-text search is not available. Text search will scan all entries.")
+            return False
+
+    def add_entry(self,
+                  url: str,
+                  title: str,
+                  artist_list: list[str],
+                  platform: str | None,
+                  date: str | None,
+                  path_to_file: str | None = None,
+                  playlist_url: str | None = None,
+                  playlist_title: str | None = None):
+        artists = ", ".join(artist_list)
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO entries (url, title, artists, platform, date, playlist_url, playlist_title, path_to_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, title, artists, platform, date, playlist_url, playlist_title, path_to_file))
+            self._connection.executemany(
+                "INSERT INTO entry_artists (entry_id, artist) VALUES (?, ?)",
+                [(cursor.lastrowid, artist) for artist in artist_list])
+            if self.has_full_text_search:
+                self._connection.execute(
+                    "INSERT INTO entries_text (rowid, title, artists, playlist_title) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, title, artists, playlist_title or ''))
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def search(self,
+               text: str | None = None,
+               artist: str | None = None,
+               platform: str | None = None,
+               date: str | None = None,
+               playlist: str | None = None,
+               limit: int = 50) -> list[tuple]:
+        conditions: list[str] = []
+        parameters: list = []
+        if text:
+            if self.has_full_text_search:
+                conditions.append("id IN (SELECT rowid FROM entries_text WHERE entries_text MATCH ?)")
+                parameters.append(" ".join('"' + token.replace('"', '""') + '"' for token in text.split()))
+            else:
+                conditions.append("(title LIKE ? OR artists LIKE ? OR playlist_title LIKE ?)")
+                parameters += [f"%{text}%"] * 3
+        if artist:
+            conditions.append("id IN (SELECT entry_id FROM entry_artists WHERE artist = ?)")
+            parameters.append(artist)
+        if platform:
+            conditions.append("platform = ? COLLATE NOCASE")
+            parameters.append(platform)
+        if date:
+            conditions.append("date = ?")
+            parameters.append(date)
+        if playlist:
+            conditions.append("(playlist_url = ? OR playlist_title = ? COLLATE NOCASE)")
+            parameters += [playlist, playlist]
+        query = "SELECT date, platform, url, title, artists, playlist_title, path_to_file FROM entries"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id DESC LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+def open_index_store(path_to_store_file: str) -> IndexStore | None:
+    try:
+        return IndexStore(path_to_store_file)
+    except sqlite3.Error as e:
+        MessageHandler.error(f"Failed to open the searchable index. Only the text index will be written. Details: {e}")
+        return None
+
+
+def build_line_pattern(indexing_format: str) -> re.Pattern:
+    pattern = re.escape(indexing_format)
+    for placeholder, group in LINE_PLACEHOLDERS.items():
+        escaped_placeholder = re.escape(placeholder)
+        group_name = group[4:group.index('>')]
+        pattern = pattern.replace(escaped_placeholder, group, 1).replace(escaped_placeholder, f'(?P={group_name})')
+    return re.compile(f'^{pattern}$')
+
+
+def import_index_file(store: IndexStore, path_to_index_file: str, indexing_format: str) -> tuple[int, int]:
+    line_pattern = build_line_pattern(indexing_format)
+    imported_count = 0
+    skipped_count = 0
+    playlist: re.Match | None = None
+    playlist_titles: dict[str, str] = {}
+    with open(path_to_index_file, 'r') as file:
+        for line in file:
+            line = line.rstrip('\n')
+            if not line.strip():
+                playlist = None
+                continue
+            header = PLAYLIST_HEADER_PATTERN.match(line)
+            if header is not None:
+                playlist = header
+                playlist_titles.setdefault(header['url'], header['title'])
+                continue
+            is_playlist_entry = playlist is not None and line.startswith('\t')
+            match = line_pattern.match(line[1:] if is_playlist_entry else line)
+            if match is None:
+                skipped_count += 1
+                continue
+            fields = match.groupdict()
+            artists = fields.get('artists')
+            store.add_entry(
+                fields.get('url', ''),
+                fields.get('title', ''),
+                artists.split(', ') if artists else [],
+                fields.get('platform') or (playlist['platform'] if is_playlist_entry else None),
+                fields.get('date'),
+                playlist_url=playlist['url'] if is_playlist_entry else None,
+                playlist_title=playlist_titles[playlist['url']] if is_playlist_entry else None)
+            imported_count += 1
+    store.commit()
+    return imported_count, skipped_count
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import threading
+
+from DownloadManager.message_handler import MessageHandler
+
+JOB_QUEUED = 'queued'
+JOB_DOWNLOADING = 'downloading'
+ENTRY_DOWNLOADED = 'downloaded'
+ENTRY_TRANSCODED = 'transcoded'
+
+
+class JobJournal:
+
+    def __init__(self, path_to_journal_file: str):
+        self.path_to_journal_file = path_to_journal_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_to_journal_file, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "platform TEXT NOT NULL, "
+            "code TEXT NOT NULL, "
+            "is_playlist INTEGER NOT NULL, "
+            "url TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "sequence INTEGER NOT NULL, "
+            "PRIMARY KEY (platform, code, is_playlist)"
+            ")")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "platform TEXT NOT NULL, "
+            "code TEXT NOT NULL, "
+            "url TEXT NOT NULL, "
+            "title TEXT NOT NULL, "
+            "uploader TEXT NOT NULL, "
+            "path_to_file TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "PRIMARY KEY (platform, code)"
+            ") WITHOUT ROWID")
+        self._sequence = self._connection.execute("SELECT COALESCE(MAX(sequence), 0) FROM jobs").fetchone()[0]
+
+    def unfinished_jobs(self) -> list[tuple[str, tuple[str, str, bool]]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT platform, url, code, is_playlist FROM jobs ORDER BY sequence").fetchall()
+        return [(platform, (url, code, bool(is_playlist))) for platform, url, code, is_playlist in rows]
+
+    def record_job(self, platform: str, url: tuple[str, str, bool], state: str):
+        with self._lock:
+            self._sequence += 1
+            self._execute(
+                "INSERT INTO jobs (platform, code, is_playlist, url, state, sequence) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (platform, code, is_playlist) DO UPDATE SET state = excluded.state",
+                (platform, url[1], int(url[2]), url[0], state, self._sequence))
+
+    def finish_job(self, platform: str, code: str, is_playlist: bool):
+        with self._lock:
+            self._execute(
+                "DELETE FROM jobs WHERE platform = ? AND code = ? AND is_playlist = ?",
+                (platform, code, int(is_playlist)))
+
+    def record_entry(self, platform: str, code: str, url: str, title: str, uploader: str, path_to_file: str, state: str):
+        with self._lock:
+            self._execute(
+                "INSERT OR REPLACE INTO entries (platform, code, url, title, uploader, path_to_file, state) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, code, url, title, uploader, path_to_file, state))
+
+    def finish_entry(self, platform: str, code: str):
+        with self._lock:
+            self._execute("DELETE FROM entries WHERE platform = ? AND code = ?", (platform, code))
+
+    def recover_entry(self, platform: str, code: str) -> tuple[str, str, str, str, str] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, title, uploader, path_to_file, state FROM entries WHERE platform = ? AND code = ?",
+                (platform, code)).fetchone()
+        if row is None:
+            return None
+        if not os.path.exists(row[3]):
+            self.finish_entry(platform, code)
+            return None
+        return row
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, statement: str, parameters: tuple):
+        try:
+            self._connection.execute(statement, parameters)
+        except sqlite3.Error as e:
+            MessageHandler.error(f"Failed to update the job journal: {e}")
+
+
+def open_journal(path_to_journal_file: str) -> JobJournal | None:
+    try:
+        return JobJournal(path_to_journal_file)
+    except sqlite3.Error as e:
+        MessageHandler.error(f"Failed to open the job journal. Unfinished work will not be resumed after a crash. Details: {e}")
+        return None
@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from DownloadManager.message_handler import MessageHandler
+
+DEFAULT_TTL_SECONDS = 1800
+
+
+class MetadataCache:
+
+    def __init__(self, path_to_cache_file: str, max_size_bytes: int, ttl_seconds: dict[str, int]):
+        self.path_to_cache_file = path_to_cache_file
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_to_cache_file, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "key TEXT PRIMARY KEY, "
+            "platform TEXT NOT NULL, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created REAL NOT NULL, "
+            "last_used REAL NOT NULL"
+            ")")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS metadata_last_used ON metadata (last_used)")
+        self._total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+
+    def get(self, platform: str, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, size, created FROM metadata WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, size, created = row
+            if now - created > self.ttl_seconds.get(platform.lower(), DEFAULT_TTL_SECONDS):
+                self._delete(key, size)
+                return None
+            self._connection.execute("UPDATE metadata SET last_used = ? WHERE key = ?", (now, key))
+        try:
+            return json.loads(zlib.decompress(value))
+        except (zlib.error, ValueError):
+            self.invalidate(key)
+            return None
+
+    def put(self, platform: str, key: str, info: dict):
+        value = zlib.compress(json.dumps(info, separators=(',', ':')).encode('utf-8'))
+        if len(value) > self.max_size_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._connection.execute("SELECT size FROM metadata WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._delete(key, row[0])
+                self._connection.execute(
+                    "INSERT INTO metadata (key, platform, value, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, platform, value, len(value), now, now))
+                self._total_size += len(value)
+                self._evict()
+        except sqlite3.Error as e:
+            MessageHandler.error(f"Failed to cache metadata for {key}: {e}")
+
+    def invalidate(self, key: str):
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM metadata WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._delete(key, row[0])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _delete(self, key: str, size: int):
+        self._connection.execute("DELETE FROM metadata WHERE key = ?", (key,))
+        self._total_size -= size
+
+    def _evict(self):
+        while self._total_size > self.max_size_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM metadata ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._total_size = 0
+                return
+            for key, size in rows:
+                self._delete(key, size)
+                if self._total_size <= self.max_size_bytes:
+                    return
+
+
+def open_metadata_cache(path_to_cache_file: str, max_size_bytes: int, ttl_seconds: dict[str, int]) -> MetadataCache | None:
+    if max_size_bytes == 0:
+        return None
+    try:
+        return MetadataCache(path_to_cache_file, max_size_bytes, ttl_seconds)
+    except sqlite3.Error as e:
+        MessageHandler.error(f"Failed to open the metadata cache. Metadata will be fetched every time. Details: {e}")
+        return None
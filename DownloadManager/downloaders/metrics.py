@@ -0,0 +1,195 @@
+import http.server
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from DownloadManager.message_handler import MessageHandler
+
+
+class DownloadStats:
+    def __init__(self):
+        self.bytes_downloaded = 0
+        self.seconds = 0.0
+        self.peak_rate = 0.0
+
+
+class JobMetrics:
+    def __init__(self, platform: str, code: str):
+        self.platform = platform
+        self.code = code
+        self.title: str | None = None
+        self.metadata_seconds: float | None = None
+        self.download_seconds: float | None = None
+        self.bytes_downloaded: int | None = None
+        self.average_rate: float | None = None
+        self.peak_rate: float | None = None
+        self.encode_seconds: float | None = None
+        self.encode_mode: str | None = None
+        self.encode_fps: float | None = None
+        self.realtime_factor: float | None = None
+        self.input_size: int | None = None
+        self.output_size: int | None = None
+        self.compression_ratio: float | None = None
+        self.index_seconds: float | None = None
+        self.success = False
+
+    def add_download_stats(self, stats: DownloadStats | None):
+        if stats is None:
+            return
+        self.download_seconds = stats.seconds
+        self.bytes_downloaded = stats.bytes_downloaded
+        self.average_rate = stats.bytes_downloaded / stats.seconds if stats.seconds > 0 else None
+        self.peak_rate = stats.peak_rate or self.average_rate
+
+    def add_encode_stats(self, seconds: float, mode: str, frame_count: int, duration: float | None, input_size: int, output_size: int):
+        self.encode_seconds = seconds
+        self.encode_mode = mode
+        self.encode_fps = frame_count / seconds if frame_count and seconds > 0 else None
+        self.realtime_factor = duration / seconds if duration and seconds > 0 else None
+        self.input_size = input_size
+        self.output_size = output_size
+        self.compression_ratio = input_size / output_size if output_size else None
+
+    def to_dict(self) -> dict:
+        return {'type': 'job', **self.__dict__}
+
+
+class MetricsRecorder:
+    def __init__(self, path_to_metrics_file: str | None, path_to_prometheus_file: str | None = None, prometheus_port: int = 0):
+        self.path_to_metrics_file = path_to_metrics_file
+        self.path_to_prometheus_file = path_to_prometheus_file
+        self._downloads: dict[str, DownloadStats] = {}
+        self._worker_downloads: dict[str, set[str]] = {}
+        self._totals: dict[tuple[str, str], float] = {}
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._metrics_file = None
+        self._server: http.server.ThreadingHTTPServer | None = None
+        if path_to_metrics_file is not None:
+            try:
+                self._metrics_file = open(path_to_metrics_file, 'a', encoding='utf-8')
+            except OSError as e:
+                MessageHandler.error(f"Failed to open the metrics file {path_to_metrics_file}. Metrics will not be saved. Details: {e}")
+        if prometheus_port > 0:
+            self._start_server(prometheus_port)
+
+    def progress_hook(self, worker: str) -> Callable[[dict], None]:
+        def hook(d: dict):
+            video_id = (d.get('info_dict') or {}).get('id')
+            if video_id is None:
+                return
+            with self._lock:
+                stats = self._downloads.setdefault(video_id, DownloadStats())
+                self._worker_downloads.setdefault(worker, set()).add(video_id)
+                if d['status'] == 'downloading':
+                    stats.peak_rate = max(stats.peak_rate, d.get('speed') or 0.0)
+                elif d['status'] == 'finished':
+                    stats.bytes_downloaded += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                    stats.seconds += d.get('elapsed') or 0.0
+        return hook
+
+    def take_download_stats(self, video_id: str) -> DownloadStats | None:
+        with self._lock:
+            return self._downloads.pop(video_id, None)
+
+    def discard_download_stats(self, worker: str):
+        with self._lock:
+            for video_id in self._worker_downloads.pop(worker, set()):
+                self._downloads.pop(video_id, None)
+
+    def record(self, metrics: JobMetrics):
+        with self._lock:
+            self._count(metrics.platform, 'jobs_succeeded_total' if metrics.success else 'jobs_failed_total', 1)
+            self._count(metrics.platform, 'bytes_downloaded_total', metrics.bytes_downloaded)
+            self._count(metrics.platform, 'metadata_seconds_total', metrics.metadata_seconds)
+            self._count(metrics.platform, 'download_seconds_total', metrics.download_seconds)
+            self._count(metrics.platform, 'encode_seconds_total', metrics.encode_seconds)
+            self._count(metrics.platform, 'index_seconds_total', metrics.index_seconds)
+            self._count(metrics.platform, 'encode_input_bytes_total', metrics.input_size)
+            self._count(metrics.platform, 'encode_output_bytes_total', metrics.output_size)
+            self._write_line(metrics.to_dict())
+            self._write_prometheus_file()
+
+    def close(self) -> dict:
+        with self._lock:
+            report = {
+                'type': 'run',
+                'started': self._started,
+                'seconds': time.time() - self._started,
+                'platforms': {},
+            }
+            for (platform, name), value in self._totals.items():
+                report['platforms'].setdefault(platform, {})[name] = value
+            self._write_line(report)
+            if self._metrics_file is not None:
+                self._metrics_file.close()
+                self._metrics_file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        return report
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            return self._prometheus_text()
+
+    def _count(self, platform: str, name: str, value: float | None):
+        if value is not None:
+            self._totals[(platform, name)] = self._totals.get((platform, name), 0) + value
+
+    def _write_line(self, record: dict):
+        if self._metrics_file is None:
+            return
+        try:
+            self._metrics_file.write(json.dumps(record) + '\n')
+            self._metrics_file.flush()
+        except OSError as e:
+            MessageHandler.error(f"Failed to write metrics: {e}")
+
+    def _prometheus_text(self) -> str:
+        lines: list[str] = []
+        for name in sorted({name for _, name in self._totals}):
+            lines.append(f"# TYPE download_manager_{name} counter")
+            for (platform, total_name), value in sorted(self._totals.items()):
+                if total_name == name:
+                    lines.append(f'download_manager_{name}{{platform="{platform}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _write_prometheus_file(self):
+        if self.path_to_prometheus_file is None:
+            return
+        path_to_temp = f"{self.path_to_prometheus_file}.temp"
+        try:
+            with open(path_to_temp, 'w', encoding='utf-8') as prometheus_file:
+                prometheus_file.write(self._prometheus_text())
+            os.replace(path_to_temp, self.path_to_prometheus_file)
+        except OSError as e:
+            MessageHandler.error(f"Failed to write the Prometheus metrics file: {e}")
+
+    def _start_server(self, port: int):
+        recorder = self
+
+        class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = http.server.ThreadingHTTPServer(('127.0.0.1', port), MetricsRequestHandler)
+        except OSError as e:
+            MessageHandler.error(f"Failed to start the metrics endpoint on port {port}. Details: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        MessageHandler.info(f"Metrics are available at http://127.0.0.1:{port}/metrics")
@@ -0,0 +1,476 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.journal import ENTRY_TRANSCODED
+from DownloadManager.downloaders.metrics import JobMetrics
+from DownloadManager.downloaders.transcoding import TranscodeProfile, MediaInfo, probe_media, run_ffmpeg, thread_args, encode_in_segments, \
+    extension_to_muxer
+
+STAGE_QUEUE_SIZE = 2
+THREADS_PER_ENCODE = 4
+INDEX_FLUSH_POLL_SECONDS = 1.0
+
+
+class PipelineJob:
+    __slots__ = ('platform', 'url', 'code', 'title', 'uploader', 'path_to_file', 'transcode_profile', 'playlist',
+                 'is_transcoded', 'success', 'metrics', 'renditions')
+
+    def __init__(self,
+                 platform: str,
+                 url: str,
+                 code: str,
+                 title: str,
+                 uploader: str,
+                 path_to_file: str,
+                 transcode_profile: TranscodeProfile | None,
+                 playlist=None):
+        self.platform = platform
+        self.url = url
+        self.code = code
+        self.title = title
+        self.uploader = uploader
+        self.path_to_file = path_to_file
+        self.transcode_profile = transcode_profile
+        self.playlist = playlist
+        self.is_transcoded = False
+        self.success = False
+        self.metrics: JobMetrics | None = None
+        self.renditions: list[tuple[str, str]] = []
+
+
+class PlaylistRecord:
+    __slots__ = ('platform', 'url', 'code', 'title', 'submitted_count', 'received_count', 'success_count', 'indexed_count',
+                 'is_closed')
+
+    def __init__(self, platform: str, url: str, code: str, title: str):
+        self.platform = platform
+        self.url = url
+        self.code = code
+        self.title = title
+        self.submitted_count = 0
+        self.received_count = 0
+        self.success_count = 0
+        self.indexed_count = 0
+        self.is_closed = False
+
+    def is_complete(self) -> bool:
+        return self.is_closed and self.received_count == self.submitted_count
+
+
+def split_core_budget(core_budget: int) -> tuple[int, int]:
+    if core_budget <= THREADS_PER_ENCODE:
+        return 1, max(core_budget, 1)
+    worker_count = core_budget // THREADS_PER_ENCODE
+    return worker_count, core_budget // worker_count
+
+
+class EncodeSlots:
+    def __init__(self, count: int):
+        self.count = count
+        self._free = count
+        self._waiting_for_all = 0
+        self._changed = threading.Condition()
+
+    def acquire(self, count: int):
+        with self._changed:
+            if count == self.count:
+                self._waiting_for_all += 1
+            try:
+                self._changed.wait_for(lambda: self._free >= count and (count == self.count or self._waiting_for_all == 0))
+            finally:
+                if count == self.count:
+                    self._waiting_for_all -= 1
+            self._free -= count
+
+    def release(self, count: int):
+        with self._changed:
+            self._free += count
+            self._changed.notify_all()
+
+
+class TranscodeStage:
+    def __init__(self,
+                 output_queue: queue.Queue,
+                 core_budget: int,
+                 journal,
+                 stream_copy: bool = True,
+                 max_copy_video_bitrate: int = 0,
+                 segment_from_duration: int = 0,
+                 segment_length: int = 0,
+                 path_to_output_dir: str | None = None):
+        self.journal = journal
+        self.stream_copy = stream_copy
+        self.max_copy_video_bitrate = max_copy_video_bitrate
+        self.segment_from_duration = segment_from_duration
+        self.segment_length = segment_length
+        self.path_to_output_dir = path_to_output_dir
+        self.worker_count, self.threads_per_job = split_core_budget(core_budget)
+        self._encode_slots = EncodeSlots(self.worker_count)
+        self.input_queue: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+        self._output_queue = output_queue
+        self._workers = [
+            threading.Thread(target=self._run, name=f"transcode-stage-{i}", daemon=True)
+            for i in range(self.worker_count)
+        ]
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+
+    def finish(self):
+        for _ in self._workers:
+            self.input_queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        while True:
+            job: PipelineJob | None = self.input_queue.get()
+            if job is None:
+                return
+            job.success = self._move_to_output_dir(job) if job.is_transcoded else self.transcode(job)
+            if self.journal is not None:
+                if job.success:
+                    self.journal.record_entry(job.platform, job.code, job.url, job.title, job.uploader, job.path_to_file, ENTRY_TRANSCODED)
+                else:
+                    self.journal.finish_entry(job.platform, job.code)
+            self._output_queue.put(job)
+
+    def transcode(self, job: PipelineJob) -> bool:
+        profile = job.transcode_profile
+        if profile is None:
+            return self._move_to_output_dir(job)
+        source = job.path_to_file
+        base, extension = os.path.splitext(source)
+        if self.path_to_output_dir is not None:
+            base = os.path.join(self.path_to_output_dir, os.path.basename(base))
+        path_to_output = f"{base}.{profile.output_extension}"
+        path_to_temp = f"{base}.temp.{profile.output_extension}"
+        media = probe_media(source) if self.stream_copy or self.segment_from_duration > 0 else None
+        video_args, audio_args = profile.split_args(media if self.stream_copy else None, self.max_copy_video_bitrate)
+        transcode_args = [*video_args, *audio_args]
+        is_copy_only = TranscodeProfile.is_copy_only(transcode_args)
+        renditions = [
+            (name, f"{base}.{name}.temp.{rendition.output_extension}", f"{base}.{name}.{rendition.output_extension}", rendition)
+            for name, rendition in profile.renditions.items()
+        ]
+        video_output_count = sum(
+            '-vn' not in output_video_args
+            for output_video_args in (video_args, *(rendition.split_args(media if self.stream_copy else None, self.max_copy_video_bitrate)[0]
+                                                    for _, _, _, rendition in renditions)))
+        threads_per_output = max(self.threads_per_job // max(video_output_count, 1), 1)
+        rendition_args = [
+            arg
+            for _, path_to_rendition_temp, _, rendition in renditions
+            for arg in self._output_args(rendition, media, path_to_rendition_temp, threads_per_output)
+        ]
+        if is_copy_only and not renditions and extension == f".{profile.output_extension}" and '-vn' not in transcode_args and '-an' not in transcode_args:
+            if job.metrics is not None:
+                size = os.path.getsize(source)
+                job.metrics.add_encode_stats(0.0, 'copy', 0, media.duration if media is not None else None, size, size)
+            MessageHandler.success(f"{job.title} is already in the target format. Skipping conversion.")
+            return self._move_to_output_dir(job)
+        is_segmented = self._should_segment(video_args, media)
+        if renditions:
+            MessageHandler.info(f"Converting and compressing {job.title} into {len(renditions) + 1} copies...")
+        elif is_copy_only:
+            MessageHandler.info(f"Remuxing {job.title} without re-encoding...")
+        elif is_segmented:
+            MessageHandler.info(f"Converting and compressing {job.title} in {self.segment_length} second segments...")
+        else:
+            MessageHandler.info(f"Converting and compressing {job.title}...")
+        started = time.monotonic()
+        slot_count = self.worker_count if is_segmented else 1
+        self._encode_slots.acquire(slot_count)
+        try:
+            input_size = os.path.getsize(source)
+            if is_segmented:
+                outputs = [
+                    (video_args, audio_args, path_to_temp),
+                    *((*rendition.split_args(media if self.stream_copy else None, self.max_copy_video_bitrate), path_to_rendition_temp)
+                      for _, path_to_rendition_temp, _, rendition in renditions)
+                ]
+                frame_count = encode_in_segments(source, outputs, media, self.segment_length, self.worker_count, threads_per_output)
+            else:
+                frame_count = run_ffmpeg(['-i', source, *self._output_args(profile, media, path_to_temp, threads_per_output), *rendition_args])
+            for _, path_to_rendition_temp, path_to_rendition, _ in renditions:
+                os.replace(path_to_rendition_temp, path_to_rendition)
+            os.replace(path_to_temp, path_to_output)
+            if source != path_to_output:
+                os.remove(source)
+        except FileNotFoundError:
+            MessageHandler.error("FFmpeg executable not found. Make sure it is added to the PATH variable.")
+            self._move_to_output_dir(job)
+            return False
+        except subprocess.CalledProcessError as e:
+            MessageHandler.error(f"Failed to convert {job.title}. Keeping the downloaded file. Details: {e.stderr.strip()}")
+            for path in (path_to_temp, *(path_to_rendition_temp for _, path_to_rendition_temp, _, _ in renditions)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._move_to_output_dir(job)
+            return False
+        except OSError as e:
+            MessageHandler.error(f"OS-related error occurred while converting {job.title}: {e}")
+            return False
+        finally:
+            self._encode_slots.release(slot_count)
+        job.path_to_file = path_to_output
+        job.renditions = [(name, path_to_rendition) for name, _, path_to_rendition, _ in renditions]
+        if job.metrics is not None:
+            job.metrics.add_encode_stats(
+                time.monotonic() - started,
+                'remux' if is_copy_only else 'segmented' if is_segmented else 'encode',
+                frame_count,
+                media.duration if media is not None else None,
+                input_size,
+                os.path.getsize(path_to_output))
+        MessageHandler.success(f"Converted and compressed {job.title}.")
+        return True
+
+    def stream_args(self, profile: TranscodeProfile, media: MediaInfo) -> list[str] | None:
+        if profile.renditions:
+            return None
+        video_args, audio_args = profile.split_args(media if self.stream_copy else None, self.max_copy_video_bitrate)
+        transcode_args = [*video_args, *audio_args]
+        if not TranscodeProfile.is_copy_only(transcode_args):
+            return None
+        return [*transcode_args, '-f', extension_to_muxer[profile.output_extension]]
+
+    def _output_args(self, profile: TranscodeProfile, media: MediaInfo | None, path_to_output: str, thread_count: int) -> list[str]:
+        video_args, audio_args = profile.split_args(media if self.stream_copy else None, self.max_copy_video_bitrate)
+        transcode_args = [*video_args, *audio_args]
+        return [*transcode_args, *thread_args(transcode_args, thread_count), path_to_output]
+
+    def _move_to_output_dir(self, job: PipelineJob) -> bool:
+        if self.path_to_output_dir is None or os.path.dirname(os.path.abspath(job.path_to_file)) == os.path.abspath(self.path_to_output_dir):
+            return True
+        path_to_output = os.path.join(self.path_to_output_dir, os.path.basename(job.path_to_file))
+        try:
+            shutil.move(job.path_to_file, path_to_output)
+        except OSError as e:
+            MessageHandler.error(f"Failed to move {job.title} from the scratch directory: {e}")
+            return False
+        job.path_to_file = path_to_output
+        return True
+
+    def _should_segment(self, video_args: list[str], media) -> bool:
+        if self.segment_from_duration == 0 or self.worker_count == 1 or media is None or media.duration is None:
+            return False
+        if '-vn' in video_args or 'copy' in video_args:
+            return False
+        return media.duration >= self.segment_from_duration
+
+
+class IndexStage:
+    def __init__(self, indexer, archive, journal, metrics=None, tracker=None, playlist_sync=None):
+        self.indexer = indexer
+        self.archive = archive
+        self.journal = journal
+        self.metrics = metrics
+        self.tracker = tracker
+        self.playlist_sync = playlist_sync
+        self.input_queue: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+        self.index_success_counts: dict[str, int] = {}
+        self._worker = threading.Thread(target=self._run, name="index-stage", daemon=True)
+
+    def start(self):
+        self._worker.start()
+
+    def join(self):
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            try:
+                item: PipelineJob | PlaylistRecord | None = self.input_queue.get(timeout=INDEX_FLUSH_POLL_SECONDS)
+            except queue.Empty:
+                if self.indexer is not None:
+                    self.indexer.flush_if_due()
+                continue
+            if item is None:
+                return
+            if isinstance(item, PlaylistRecord):
+                item.is_closed = True
+                self._finish_playlist_if_complete(item)
+            elif item.playlist is not None:
+                self._index_playlist_entry(item)
+                self._finish_entry(item)
+                item.playlist.received_count += 1
+                self._finish_playlist_if_complete(item.playlist)
+            else:
+                if item.success and self.indexer is not None:
+                    started = time.monotonic()
+                    if self.indexer.append_to_index(item.url, item.title, [item.uploader], item.platform, item.path_to_file):
+                        self._count_success(item.platform)
+                        MessageHandler.success(f"Downloading and indexing for video {item.code} complete.")
+                    for name, path_to_rendition in item.renditions:
+                        self.indexer.append_to_index(item.url, f"{item.title} ({name})", [item.uploader], item.platform, path_to_rendition)
+                    self._record_metrics(item, time.monotonic() - started)
+                else:
+                    self._record_metrics(item)
+                self._finish_entry(item)
+                if self.journal is not None:
+                    self.journal.finish_job(item.platform, item.code, False)
+                if self.tracker is not None:
+                    self.tracker.finish_entry(item.platform, item.code, False, item.success)
+
+    def _finish_entry(self, job: PipelineJob):
+        if job.success and self.archive is not None:
+            self.archive.add(job.platform, job.code)
+        if job.success and job.playlist is not None and self.playlist_sync is not None:
+            self.playlist_sync.add(job.platform, job.playlist.code, job.code)
+        if self.journal is not None:
+            self.journal.finish_entry(job.platform, job.code)
+
+    def _index_playlist_entry(self, job: PipelineJob):
+        if job.success:
+            job.playlist.success_count += 1
+        if not job.success or self.indexer is None:
+            self._record_metrics(job)
+            return
+        started = time.monotonic()
+        if self.indexer.append_playlist_entry_to_index(
+                job.playlist.url,
+                job.playlist.title,
+                job.url,
+                job.title,
+                job.uploader,
+                job.platform,
+                job.path_to_file):
+            job.playlist.indexed_count += 1
+        for name, path_to_rendition in job.renditions:
+            self.indexer.append_playlist_entry_to_index(
+                job.playlist.url,
+                job.playlist.title,
+                job.url,
+                f"{job.title} ({name})",
+                job.uploader,
+                job.platform,
+                path_to_rendition)
+        self._record_metrics(job, time.monotonic() - started)
+
+    def _finish_playlist_if_complete(self, playlist: PlaylistRecord):
+        if not playlist.is_complete():
+            return
+        if self.journal is not None:
+            self.journal.finish_job(playlist.platform, playlist.code, True)
+        if self.tracker is not None:
+            self.tracker.finish_entry(playlist.platform, playlist.code, True, playlist.success_count > 0 or playlist.submitted_count == 0)
+        if self.indexer is not None:
+            self.indexer.close_playlist_block(playlist.url)
+        if playlist.indexed_count > 0:
+            self._count_success(playlist.platform)
+            MessageHandler.success(f"Downloading and indexing for playlist {playlist.title} complete - indexed {playlist.indexed_count} videos.")
+
+    def _record_metrics(self, job: PipelineJob, index_seconds: float | None = None):
+        if self.metrics is None or job.metrics is None:
+            return
+        job.metrics.success = job.success
+        job.metrics.index_seconds = index_seconds
+        self.metrics.record(job.metrics)
+
+    def _count_success(self, platform: str):
+        self.index_success_counts[platform] = self.index_success_counts.get(platform, 0) + 1
+
+
+class DownloadPipeline:
+    def __init__(self,
+                 indexer,
+                 core_budget: int,
+                 archive=None,
+                 journal=None,
+                 metadata_cache=None,
+                 disk_budget=None,
+                 bandwidth_limiter=None,
+                 fragment_controller=None,
+                 metrics=None,
+                 tracker=None,
+                 playlist_sync=None,
+                 stream_copy: bool = True,
+                 max_copy_video_bitrate: int = 0,
+                 segment_from_duration: int = 0,
+                 segment_length: int = 0,
+                 stream_into_ffmpeg: bool = False,
+                 path_to_save_location: str | None = None):
+        self.archive = archive
+        self.journal = journal
+        self.metadata_cache = metadata_cache
+        self.disk_budget = disk_budget
+        self.bandwidth_limiter = bandwidth_limiter
+        self.fragment_controller = fragment_controller
+        self.metrics = metrics
+        self.tracker = tracker
+        self.playlist_sync = playlist_sync
+        self.stream_into_ffmpeg = stream_into_ffmpeg
+        self._index_stage = IndexStage(indexer, archive, journal, metrics, tracker, playlist_sync)
+        self._transcode_stage = TranscodeStage(self._index_stage.input_queue, core_budget, journal, stream_copy, max_copy_video_bitrate, segment_from_duration, segment_length, path_to_save_location)
+
+    def start(self):
+        self._index_stage.start()
+        self._transcode_stage.start()
+
+    def submit(self, job: PipelineJob):
+        if job.playlist is not None:
+            job.playlist.submitted_count += 1
+        self._transcode_stage.input_queue.put(job)
+
+    def stream_args(self, profile: TranscodeProfile, media: MediaInfo) -> list[str] | None:
+        if not self.stream_into_ffmpeg:
+            return None
+        return self._transcode_stage.stream_args(profile, media)
+
+    def is_archived(self, platform: str, code: str) -> bool:
+        return self.archive is not None and self.archive.contains(platform, code)
+
+    def record_playlist_entry(self, playlist: PlaylistRecord, code: str):
+        if self.playlist_sync is not None:
+            self.playlist_sync.add(playlist.platform, playlist.code, code)
+
+    def record_job(self, platform: str, url: tuple[str, str, bool], state: str):
+        if self.journal is not None:
+            self.journal.record_job(platform, url, state)
+
+    def finish_job(self, platform: str, url: tuple[str, str, bool]):
+        if self.journal is not None:
+            self.journal.finish_job(platform, url[1], url[2])
+
+    def finish_download(self, platform: str, url: tuple[str, str, bool], is_downloaded: bool):
+        if self.disk_budget is not None:
+            self.disk_budget.release(platform, url)
+        if self.tracker is not None:
+            self.tracker.finish_download(platform, url, is_downloaded)
+
+    def attach_metrics(self, job: PipelineJob, video_id: str | None = None, metadata_seconds: float | None = None):
+        if self.metrics is None:
+            return
+        job.metrics = JobMetrics(job.platform, job.code)
+        job.metrics.title = job.title
+        job.metrics.metadata_seconds = metadata_seconds
+        if video_id is not None:
+            job.metrics.add_download_stats(self.metrics.take_download_stats(video_id))
+
+    def record_entry(self, job: PipelineJob, state: str):
+        if self.journal is not None:
+            self.journal.record_entry(job.platform, job.code, job.url, job.title, job.uploader, job.path_to_file, state)
+
+    def recover_entry(self, platform: str, code: str) -> tuple[str, str, str, str, str] | None:
+        if self.journal is None:
+            return None
+        return self.journal.recover_entry(platform, code)
+
+    def open_playlist(self, platform: str, url: str, code: str, title: str) -> PlaylistRecord:
+        return PlaylistRecord(platform, url, code, title)
+
+    def close_playlist(self, playlist: PlaylistRecord):
+        self._index_stage.input_queue.put(playlist)
+
+    def finish(self) -> dict[str, int]:
+        self._transcode_stage.finish()
+        self._index_stage.input_queue.put(None)
+        self._index_stage.join()
+        return self._index_stage.index_success_counts
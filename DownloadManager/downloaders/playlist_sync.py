@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+
+from DownloadManager.message_handler import MessageHandler
+
+
+class PlaylistSyncStore:
+
+    def __init__(self, path_to_sync_file: str):
+        self.path_to_sync_file = path_to_sync_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_to_sync_file, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_entries ("
+            "platform TEXT NOT NULL, "
+            "playlist_code TEXT NOT NULL, "
+            "video_id TEXT NOT NULL, "
+            "PRIMARY KEY (platform, playlist_code, video_id)"
+            ") WITHOUT ROWID")
+
+    def seen_entries(self, platform: str, playlist_code: str) -> set[str]:
+        with self._lock:
+            return {video_id for video_id, in self._connection.execute(
+                "SELECT video_id FROM playlist_entries WHERE platform = ? AND playlist_code = ?",
+                (platform, playlist_code))}
+
+    def add(self, platform: str, playlist_code: str, video_id: str):
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO playlist_entries (platform, playlist_code, video_id) VALUES (?, ?, ?)",
+                    (platform, playlist_code, video_id))
+        except sqlite3.Error as e:
+            MessageHandler.error(f"Failed to record {video_id} as synced for playlist {playlist_code}: {e}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_playlist_sync(path_to_sync_file: str) -> PlaylistSyncStore | None:
+    try:
+        return PlaylistSyncStore(path_to_sync_file)
+    except sqlite3.Error as e:
+        MessageHandler.error(f"Failed to open the playlist sync file. Playlists will be processed whole. Details: {e}")
+        return None
@@ -0,0 +1,68 @@
+import re
+
+from DownloadManager.downloaders.downloaders import BaseDownloader
+
+URL_PATTERN = re.compile(r'(?:(?P<scheme>[A-Za-z]+)://)?(?P<host>[^/?#:]+)(?::\d*)?(?P<path>/[^?#]*)?(?:\?(?P<query>[^#]*))?(?:#.*)?', re.DOTALL)
+ALLOWED_SCHEMES = {'http', 'https'}
+IGNORED_HOST_PREFIX = 'www.'
+
+
+def compile_parameter_pattern(name: str | None) -> re.Pattern | None:
+    if name is None:
+        return None
+    return re.compile(rf'(?:^|&){re.escape(name)}=([^&]*)')
+
+
+class UrlRoute:
+    def __init__(self, key: str, downloader: BaseDownloader, path_pattern: str):
+        self.key = key
+        self.downloader = downloader
+        self.path_pattern = re.compile(path_pattern)
+        self.has_video_group = 'video' in self.path_pattern.groupindex
+        video_parameter, playlist_parameter = downloader.url_parameters
+        self.video_parameter_pattern = compile_parameter_pattern(video_parameter)
+        self.playlist_parameter_pattern = compile_parameter_pattern(playlist_parameter)
+
+
+class UrlRouter:
+    def __init__(self, downloaders: dict[str, BaseDownloader]):
+        self._routes: dict[str, UrlRoute] = {}
+        for key, downloader in downloaders.items():
+            for host, path_pattern in downloader.url_routes.items():
+                self._routes[host] = UrlRoute(key, downloader, path_pattern)
+
+    def route(self, url: str) -> tuple[str | None, tuple[str, str, bool] | None]:
+        url_match = URL_PATTERN.fullmatch(url)
+        if url_match is None:
+            return None, None
+        scheme, host, path, query = url_match.group('scheme', 'host', 'path', 'query')
+        host = host.lower()
+        if host.startswith(IGNORED_HOST_PREFIX):
+            host = host[len(IGNORED_HOST_PREFIX):]
+        route = self._routes.get(host)
+        if route is None or (scheme is not None and scheme.lower() not in ALLOWED_SCHEMES):
+            return None, None
+        path_match = route.path_pattern.fullmatch(path or '/')
+        if path_match is None:
+            return route.key, None
+        video = path_match.group('video') if route.has_video_group else None
+        playlist = None
+        if query:
+            if video is None and route.video_parameter_pattern is not None:
+                video = first_parameter(route.video_parameter_pattern, query)
+            if route.playlist_parameter_pattern is not None:
+                playlist = first_parameter(route.playlist_parameter_pattern, query)
+        downloader = route.downloader
+        if playlist:
+            if not downloader.validate_playlist(playlist):
+                return route.key, None
+            seed_video = video if video and downloader.validate_video_part(video) else None
+            return route.key, (downloader.canonical_url(playlist, True, seed_video), playlist, True)
+        if not video or not downloader.validate_video_part(video):
+            return route.key, None
+        return route.key, (downloader.canonical_url(video, False), video, False)
+
+
+def first_parameter(parameter_pattern: re.Pattern, query: str) -> str | None:
+    parameter_match = parameter_pattern.search(query)
+    return parameter_match.group(1) if parameter_match is not None else None
@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from DownloadManager.message_handler import MessageHandler
+
+BITRATE_TOLERANCE = 1.1
+encoder_to_codec_name: dict[str, str] = {
+    'libx264': 'h264',
+    'libx265': 'hevc',
+    'libopus': 'opus',
+}
+format_codec_to_codec_name: dict[str, str] = {
+    'avc1': 'h264',
+    'avc3': 'h264',
+    'hev1': 'hevc',
+    'hvc1': 'hevc',
+}
+extension_to_muxer: dict[str, str] = {
+    'mkv': 'matroska',
+    'opus': 'opus',
+}
+
+
+class StreamInfo:
+    def __init__(self, codec_type: str, codec_name: str, bit_rate: int | None):
+        self.codec_type = codec_type
+        self.codec_name = codec_name
+        self.bit_rate = bit_rate
+
+
+class MediaInfo:
+    def __init__(self, streams: list[StreamInfo], duration: float | None):
+        self.streams = streams
+        self.duration = duration
+
+    def first_stream(self, codec_type: str) -> StreamInfo | None:
+        for stream in self.streams:
+            if stream.codec_type == codec_type:
+                return stream
+        return None
+
+
+class TranscodeProfile:
+    def __init__(self,
+                 output_extension: str,
+                 video_encoder: str | None,
+                 audio_bitrate: str | None,
+                 crf: str | None = None,
+                 preset: str | None = None,
+                 max_height: str | None = None):
+        self.output_extension = output_extension
+        self.video_encoder = video_encoder
+        self.audio_bitrate = audio_bitrate
+        self.crf = crf
+        self.preset = preset
+        self.max_height = max_height
+        self.renditions: dict[str, TranscodeProfile] = {}
+
+    def video_args(self, stream: StreamInfo | None, max_copy_video_bitrate: int) -> list[str]:
+        if self.video_encoder is None:
+            return ['-vn']
+        if self.max_height is not None:
+            return ['-c:v', self.video_encoder, '-crf', self.crf, '-preset', self.preset, '-vf', f"scale=-2:'min({self.max_height},ih)'"]
+        if stream is not None and stream.codec_name == encoder_to_codec_name[self.video_encoder]:
+            if max_copy_video_bitrate == 0 or (stream.bit_rate is not None and stream.bit_rate <= max_copy_video_bitrate * 1000 * BITRATE_TOLERANCE):
+                return ['-c:v', 'copy']
+        return ['-c:v', self.video_encoder, '-crf', self.crf, '-preset', self.preset]
+
+    def audio_args(self, stream: StreamInfo | None) -> list[str]:
+        if self.audio_bitrate is None:
+            return ['-an']
+        if stream is not None and stream.codec_name == encoder_to_codec_name['libopus'] \
+                and (stream.bit_rate is None or stream.bit_rate <= int(self.audio_bitrate) * 1000 * BITRATE_TOLERANCE):
+            return ['-c:a', 'copy']
+        return ['-c:a', 'libopus', '-b:a', f'{self.audio_bitrate}k']
+
+    def split_args(self, media: MediaInfo | None, max_copy_video_bitrate: int = 0) -> tuple[list[str], list[str]]:
+        if media is None:
+            return self.video_args(None, max_copy_video_bitrate), self.audio_args(None)
+        return self.video_args(media.first_stream('video'), max_copy_video_bitrate), self.audio_args(media.first_stream('audio'))
+
+    @staticmethod
+    def is_copy_only(args: list[str]) -> bool:
+        return 'libx264' not in args and 'libx265' not in args and 'libopus' not in args
+
+
+def create_rendition_profile(max_height: str | None, audio_bitrate: str, crf: str, preset: str, use_h265: bool) -> TranscodeProfile:
+    if max_height is None:
+        return TranscodeProfile('opus', None, audio_bitrate)
+    return TranscodeProfile('mkv', 'libx264' if use_h265 is False else 'libx265', audio_bitrate, crf, preset, max_height)
+
+
+def lower_priority_command(command: list[str]) -> tuple[list[str], dict]:
+    if os.name == 'nt':
+        return command, {'creationflags': subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+    path_to_executable = shutil.which(command[0])
+    if path_to_executable is None:
+        raise FileNotFoundError(f"{command[0]} executable not found")
+    if shutil.which('nice') is None:
+        return command, {}
+    return ['nice', '-n', '10', path_to_executable, *command[1:]], {}
+
+
+def thread_args(transcode_args: list[str], thread_count: int) -> list[str]:
+    args = ['-threads', str(thread_count)]
+    if 'libx265' in transcode_args:
+        args += ['-x265-params', f'pools={thread_count}']
+    return args
+
+
+def run_ffmpeg(args: list[str]) -> int:
+    command, options = lower_priority_command(['ffmpeg', '-y', '-loglevel', 'error', '-nostats', '-progress', 'pipe:1', *args])
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True, **options)
+    frame_count = 0
+    for line in result.stdout.splitlines():
+        if line.startswith('frame='):
+            frame_count = int(line[len('frame='):]) if line[len('frame='):].isdigit() else frame_count
+    return frame_count
+
+
+def probe_media(path_to_file: str) -> MediaInfo | None:
+    command = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'stream=codec_type,codec_name,bit_rate:stream_tags=BPS,BPS-eng:format=bit_rate,duration',
+        '-of', 'json', path_to_file
+    ]
+    try:
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+    except FileNotFoundError:
+        MessageHandler.alert("FFprobe executable not found. Every stream will be re-encoded.")
+        return None
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+    format_bit_rate = _parse_bit_rate(probe.get('format', {}).get('bit_rate'))
+    try:
+        duration = float(probe.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    probed_streams = probe.get('streams', [])
+    streams: list[StreamInfo] = []
+    for stream in probed_streams:
+        tags = stream.get('tags', {})
+        bit_rate = _parse_bit_rate(stream.get('bit_rate')) or _parse_bit_rate(tags.get('BPS')) or _parse_bit_rate(tags.get('BPS-eng'))
+        if bit_rate is None and len(probed_streams) == 1:
+            bit_rate = format_bit_rate
+        streams.append(StreamInfo(stream.get('codec_type', ''), stream.get('codec_name', ''), bit_rate))
+    return MediaInfo(streams, duration)
+
+
+def media_from_formats(formats: list[dict], duration: float | None) -> MediaInfo:
+    streams: list[StreamInfo] = []
+    for chosen_format in formats:
+        for codec_type, codec_key, bit_rate_key in (('video', 'vcodec', 'vbr'), ('audio', 'acodec', 'abr')):
+            codec = chosen_format.get(codec_key)
+            if codec is None or codec == 'none':
+                continue
+            codec_name = codec.split('.')[0].lower()
+            bit_rate = chosen_format.get(bit_rate_key)
+            streams.append(StreamInfo(codec_type, format_codec_to_codec_name.get(codec_name, codec_name), int(bit_rate * 1000) if bit_rate else None))
+    return MediaInfo(streams, duration)
+
+
+def encode_in_segments(source: str,
+                       outputs: list[tuple[list[str], list[str], str]],
+                       media: MediaInfo,
+                       segment_length: int,
+                       worker_count: int,
+                       threads_per_segment: int) -> int:
+    path_to_work_dir = tempfile.mkdtemp(prefix='.segments-', dir=os.path.dirname(source) or None)
+    try:
+        run_ffmpeg([
+            '-i', source, '-map', '0:v:0', '-c', 'copy',
+            '-f', 'segment', '-segment_time', str(segment_length), '-reset_timestamps', '1',
+            os.path.join(path_to_work_dir, 'segment%05d.mkv')])
+        segment_names = sorted(name for name in os.listdir(path_to_work_dir) if name.startswith('segment') and name.endswith('.mkv'))
+        video_outputs = [index for index, (video_args, _, _) in enumerate(outputs) if '-vn' not in video_args]
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [
+                executor.submit(run_ffmpeg, [
+                    '-i', os.path.join(path_to_work_dir, name),
+                    *(arg
+                      for index in video_outputs
+                      for arg in ('-map', '0:v:0', *outputs[index][0], *thread_args(outputs[index][0], threads_per_segment),
+                                  os.path.join(path_to_work_dir, f'encoded{index}-{name}')))])
+                for name in segment_names
+            ]
+            frame_count = sum(future.result() for future in futures)
+        has_audio = media.first_stream('audio') is not None
+        audio_outputs = [index for index, (_, audio_args, _) in enumerate(outputs) if has_audio and '-an' not in audio_args]
+        paths_to_audio = {
+            index: os.path.join(path_to_work_dir, f'audio{index}.mka') if index in video_outputs else outputs[index][2]
+            for index in audio_outputs
+        }
+        if audio_outputs:
+            run_ffmpeg([
+                '-i', source,
+                *(arg for index in audio_outputs for arg in ('-map', '0:a:0', '-vn', *outputs[index][1], paths_to_audio[index]))])
+        for index in video_outputs:
+            path_to_list = os.path.join(path_to_work_dir, f'segments{index}.txt')
+            with open(path_to_list, 'w', encoding='utf-8') as list_file:
+                list_file.writelines(f"file 'encoded{index}-{name}'\n" for name in segment_names)
+            join_args = ['-f', 'concat', '-safe', '0', '-i', path_to_list]
+            if index in audio_outputs:
+                join_args += ['-i', paths_to_audio[index], '-map', '0:v', '-map', '1:a']
+            run_ffmpeg([*join_args, '-c', 'copy', outputs[index][2]])
+        return frame_count
+    finally:
+        shutil.rmtree(path_to_work_dir, ignore_errors=True)
+
+
+def _parse_bit_rate(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,65 @@
+import os
+import sys
+from collections.abc import Iterable, Iterator
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.routing import UrlRouter
+
+STDIN_SOURCE = '-'
+
+
+def read_url_lines(sources: list[str]) -> Iterator[str]:
+    for source in sources:
+        if source == STDIN_SOURCE:
+            yield from _read_lines(sys.stdin)
+        elif os.path.isdir(source):
+            for file_name in sorted(os.listdir(source)):
+                path_to_file = os.path.join(source, file_name)
+                if os.path.isfile(path_to_file):
+                    yield from _read_file_lines(path_to_file)
+        else:
+            yield from _read_file_lines(source)
+
+
+def _read_file_lines(path_to_file: str) -> Iterator[str]:
+    try:
+        with open(path_to_file, 'r', encoding='utf-8', errors='replace') as file:
+            yield from _read_lines(file)
+    except FileNotFoundError:
+        MessageHandler.error(f"URL list {path_to_file} does not exist. Skipping...")
+    except PermissionError:
+        MessageHandler.error(f"Permission denied: Unable to read URL list {path_to_file}. Skipping...")
+    except OSError as e:
+        MessageHandler.error(f"OS-related error occurred while reading URL list {path_to_file}: {e}. Skipping...")
+
+
+def _read_lines(file) -> Iterator[str]:
+    for line in file:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def route_url(line: str, router: UrlRouter) -> tuple[str, tuple[str, str, bool]] | None:
+    match_result, sanitation_result = router.route(line)
+    if match_result is None:
+        MessageHandler.error(f"Invalid URL - does not match any registered domain: {line}. Skipping...")
+        return None
+    if sanitation_result is None:
+        MessageHandler.error(f"Malformed URL - matches {match_result} but does not meet requirements: {line}. Skipping...")
+        return None
+    return match_result, sanitation_result
+
+
+def route_urls(lines: Iterable[str], router: UrlRouter) -> Iterator[tuple[str, tuple[str, str, bool]]]:
+    seen: set[tuple[str, str, bool]] = set()
+    for line in lines:
+        route_result = route_url(line, router)
+        if route_result is None:
+            continue
+        match_result, sanitation_result = route_result
+        key = (match_result, sanitation_result[1], sanitation_result[2])
+        if key in seen:
+            continue
+        seen.add(key)
+        yield match_result, sanitation_result
@@ -1,22 +1,189 @@
+import atexit
+import queue
+import shutil
+import sys
+import threading
+import time
+
 from colorama import Fore, Style
 
+LOG_QUEUE_SIZE = 10000
+REFRESH_SECONDS = 0.25
+PLAIN_PROGRESS_SECONDS = 30.0
+MAX_CHATTER_LINES_PER_SECOND = 20
+MAX_LINES_PER_WRITE = 500
+MAX_PROGRESS_TITLE_LENGTH = 30
+CLEAR_LINE = '\r\x1b[K'
+
+
+class DownloadProgress:
+    def __init__(self, title: str, downloaded_bytes: int, total_bytes: int | None, speed: float | None):
+        self.title = title
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.speed = speed
+
+    def __str__(self):
+        title = self.title if len(self.title) <= MAX_PROGRESS_TITLE_LENGTH else f"{self.title[:MAX_PROGRESS_TITLE_LENGTH - 3]}..."
+        if self.total_bytes:
+            done = f"{min(self.downloaded_bytes / self.total_bytes, 1.0):.0%}"
+        else:
+            done = f"{self.downloaded_bytes / (1024 * 1024):.1f}MiB"
+        if self.speed:
+            return f"{title} {done} {self.speed / (1024 * 1024):.1f}MiB/s"
+        return f"{title} {done}"
+
+
+class LogSink:
+    def __init__(self, stream, is_tty: bool):
+        self.is_tty = is_tty
+        self._stream = stream
+        self._queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._progress: dict[str, DownloadProgress] = {}
+        self._progress_printed: dict[str, float] = {}
+        self._status_line = ''
+        self._chatter_second = 0
+        self._chatter_count = 0
+        self._dropped_count = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._writer.start()
+
+    def stop(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._queue.put(None)
+        self._writer.join()
+
+    def write(self, line: str, is_chatter: bool = False):
+        if self._stopped.is_set():
+            print(line)
+            return
+        if not is_chatter:
+            self._queue.put(line)
+            return
+        second = int(time.monotonic())
+        with self._lock:
+            if second != self._chatter_second:
+                self._chatter_second = second
+                self._chatter_count = 0
+            self._chatter_count += 1
+            if self._chatter_count > MAX_CHATTER_LINES_PER_SECOND:
+                self._dropped_count += 1
+                return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self._dropped_count += 1
+
+    def update_progress(self, key: str, progress: DownloadProgress):
+        with self._lock:
+            self._progress[key] = progress
+
+    def clear_progress(self, key: str):
+        with self._lock:
+            self._progress.pop(key, None)
+            self._progress_printed.pop(key, None)
+
+    def _run(self):
+        is_running = True
+        while is_running:
+            lines: list[str] = []
+            try:
+                line = self._queue.get(timeout=REFRESH_SECONDS)
+                while line is not None:
+                    lines.append(line)
+                    if len(lines) == MAX_LINES_PER_WRITE:
+                        break
+                    line = self._queue.get_nowait()
+                else:
+                    is_running = False
+            except queue.Empty:
+                pass
+            self._write(lines, is_running)
+
+    def _write(self, lines: list[str], is_running: bool):
+        with self._lock:
+            dropped_count, self._dropped_count = self._dropped_count, 0
+            progress = list(self._progress.items()) if is_running else []
+        if dropped_count > 0:
+            lines.append(MessageHandler.format_line(
+                Fore.YELLOW, f"[WARNING] Skipped {dropped_count} log lines to keep up with downloading.", self.is_tty))
+        if self.is_tty:
+            status_line = self._render_status_line(progress)
+            if not lines and status_line == self._status_line:
+                return
+            self._status_line = status_line
+            text = CLEAR_LINE + ''.join(f"{line}\n" for line in lines) + status_line
+        else:
+            now = time.monotonic()
+            for key, download_progress in progress:
+                if now - self._progress_printed.get(key, 0.0) >= PLAIN_PROGRESS_SECONDS:
+                    self._progress_printed[key] = now
+                    lines.append(f"[PROGRESS] {download_progress}")
+            if not lines:
+                return
+            text = ''.join(f"{line}\n" for line in lines)
+        try:
+            self._stream.write(text)
+            self._stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _render_status_line(progress: list[tuple[str, DownloadProgress]]) -> str:
+        if not progress:
+            return ''
+        status_line = ' | '.join(str(download_progress) for _, download_progress in progress)
+        width = shutil.get_terminal_size().columns - 1
+        return status_line if len(status_line) <= width else status_line[:width]
+
 
 class MessageHandler:
+    sink: LogSink | None = None
+
+    @staticmethod
+    def start_log_sink():
+        if MessageHandler.sink is not None:
+            return
+        MessageHandler.sink = LogSink(sys.stdout, sys.stdout.isatty())
+        MessageHandler.sink.start()
+        atexit.register(MessageHandler.stop_log_sink)
+
+    @staticmethod
+    def stop_log_sink():
+        sink = MessageHandler.sink
+        if sink is None:
+            return
+        MessageHandler.sink = None
+        sink.stop()
+
+    @staticmethod
+    def format_line(color: str, msg: str, is_tty: bool) -> str:
+        if not is_tty:
+            return msg
+        return color + msg + Style.RESET_ALL
+
     @staticmethod
     def debug(msg):
         if msg.startswith('[debug] '):
             pass
         else:
-            MessageHandler.info(msg)
+            MessageHandler._write(Style.RESET_ALL, f"[INFO] {msg}", True)
         pass
 
     @staticmethod
     def info(msg):
-        print(Style.RESET_ALL + f"[INFO] {msg}")
+        MessageHandler._write(Style.RESET_ALL, f"[INFO] {msg}")
 
     @staticmethod
     def alert(msg):
-        print(Fore.YELLOW + f"[WARNING] {msg}" + Style.RESET_ALL)
+        MessageHandler._write(Fore.YELLOW, f"[WARNING] {msg}")
 
     @staticmethod
     def warning(msg):
@@ -24,11 +191,26 @@ class MessageHandler:
 
     @staticmethod
     def error(msg):
-        print(Fore.RED + f"[ERROR] {msg}" + Style.RESET_ALL)
+        MessageHandler._write(Fore.RED, f"[ERROR] {msg}")
 
     @staticmethod
     def success(msg):
-        print(Fore.GREEN + f"[SUCCESS] {msg}" + Style.RESET_ALL)
+        MessageHandler._write(Fore.GREEN, f"[SUCCESS] {msg}")
+
+    @staticmethod
+    def progress(d: dict):
+        sink = MessageHandler.sink
+        if sink is None:
+            return
+        key = d.get('filename') or d.get('tmpfilename') or ''
+        if d['status'] != 'downloading':
+            sink.clear_progress(key)
+            return
+        sink.update_progress(key, DownloadProgress(
+            (d.get('info_dict') or {}).get('title') or key,
+            d.get('downloaded_bytes') or 0,
+            d.get('total_bytes') or d.get('total_bytes_estimate'),
+            d.get('speed')))
 
     @staticmethod
     def banner(msg):
@@ -36,4 +218,15 @@ class MessageHandler:
 
     @staticmethod
     def receive_input(msg):
-        return input(Style.RESET_ALL + msg)
\ No newline at end of file
+        return input(Style.RESET_ALL + msg)
+
+    @staticmethod
+    def _write(color: str, msg: str, is_chatter: bool = False):
+        sink = MessageHandler.sink
+        if sink is None:
+            if color == Style.RESET_ALL:
+                print(color + msg)
+            else:
+                print(color + msg + Style.RESET_ALL)
+            return
+        sink.write(MessageHandler.format_line(color, msg, sink.is_tty), is_chatter)
@@ -0,0 +1,145 @@
+import shutil
+import threading
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.downloaders import BaseDownloader
+from DownloadManager.downloaders.pipeline import DownloadPipeline
+
+ORDER_INPUT = 'input'
+ORDER_SHORTEST_FIRST = 'shortest_first'
+SPACE_POLL_SECONDS = 5.0
+FALLBACK_BYTES_PER_SECOND = 256 * 1024
+
+
+class DiskBudget:
+    def __init__(self, path_to_save_location: str, min_free_space: int):
+        self.path_to_save_location = path_to_save_location
+        self.min_free_space = min_free_space
+        self._reserved: dict[tuple[str, str, bool], int] = {}
+        self._reserved_total = 0
+        self._released = threading.Condition()
+
+    def free_space(self) -> int:
+        return shutil.disk_usage(self.path_to_save_location).free - self.min_free_space
+
+    def try_reserve(self, platform: str, url: tuple[str, str, bool], size: int) -> bool:
+        with self._released:
+            if size > self.free_space() - self._reserved_total:
+                return False
+            self._reserved[(platform, url[1], url[2])] = size
+            self._reserved_total += size
+            return True
+
+    def release(self, platform: str, url: tuple[str, str, bool]):
+        with self._released:
+            size = self._reserved.pop((platform, url[1], url[2]), None)
+            if size is None:
+                return
+            self._reserved_total -= size
+            self._released.notify_all()
+
+    def has_reservations(self) -> bool:
+        with self._released:
+            return self._reserved_total > 0
+
+    def wait_for_release(self, timeout: float):
+        with self._released:
+            self._released.wait(timeout)
+
+
+class PlannedJob:
+    def __init__(self, key: str, url: tuple[str, str, bool], duration: float | None, estimated_size: int | None):
+        self.key = key
+        self.url = url
+        self.duration = duration
+        self.estimated_size = estimated_size
+        self.is_deferred = False
+
+    def cost(self, bytes_per_second: float) -> float:
+        if self.estimated_size is not None:
+            return float(self.estimated_size)
+        if self.duration is not None:
+            return self.duration * bytes_per_second
+        return float('inf')
+
+    @staticmethod
+    def bytes_per_second(jobs: list['PlannedJob']) -> float:
+        sized_jobs = [job for job in jobs if job.estimated_size and job.duration]
+        if not sized_jobs:
+            return FALLBACK_BYTES_PER_SECOND
+        return sum(job.estimated_size for job in sized_jobs) / sum(job.duration for job in sized_jobs)
+
+
+class DownloadPlanner:
+    def __init__(self,
+                 downloaders: dict[str, BaseDownloader],
+                 pipeline: DownloadPipeline,
+                 disk_budget: DiskBudget,
+                 prefetch_workers: int,
+                 plan_window: int,
+                 job_order: str,
+                 max_file_size: str | None):
+        self.downloaders = downloaders
+        self.pipeline = pipeline
+        self.disk_budget = disk_budget
+        self.prefetch_workers = prefetch_workers
+        self.plan_window = plan_window
+        self.job_order = job_order
+        self.max_file_size = int(max_file_size) * 1024 * 1024 if max_file_size is not None else None
+
+    def plan(self, url_feed: Iterable[tuple[str, tuple[str, str, bool]]]) -> Iterator[tuple[str, tuple[str, str, bool]]]:
+        deferred: list[PlannedJob] = []
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers, thread_name_prefix="prefetch") as executor:
+            for window in self._read_windows(url_feed):
+                MessageHandler.info(f"Fetching information for {len(window)} queued entries...")
+                jobs = list(executor.map(self._prefetch, window))
+                if self.job_order == ORDER_SHORTEST_FIRST:
+                    bytes_per_second = PlannedJob.bytes_per_second(jobs)
+                    jobs.sort(key=lambda job: job.cost(bytes_per_second))
+                deferred = yield from self._admit(deferred + jobs)
+        while deferred:
+            self.disk_budget.wait_for_release(SPACE_POLL_SECONDS)
+            deferred = yield from self._admit(deferred)
+
+    def _read_windows(self, url_feed: Iterable[tuple[str, tuple[str, str, bool]]]) -> Iterator[list[tuple[str, tuple[str, str, bool]]]]:
+        window: list[tuple[str, tuple[str, str, bool]]] = []
+        for item in url_feed:
+            window.append(item)
+            if len(window) == self.plan_window:
+                yield window
+                window = []
+        if window:
+            yield window
+
+    def _prefetch(self, item: tuple[str, tuple[str, str, bool]]) -> PlannedJob:
+        key, url = item
+        downloader = self.downloaders[key]
+        if url[2]:
+            return PlannedJob(key, url, None, None)
+        if self.pipeline.is_archived(downloader.platform, url[1]):
+            return PlannedJob(key, url, 0.0, 0)
+        estimate = downloader.estimate_entry(self.pipeline.metadata_cache, url)
+        if estimate is None:
+            return PlannedJob(key, url, None, None)
+        return PlannedJob(key, url, estimate[0], estimate[1])
+
+    def _admit(self, jobs: list[PlannedJob]) -> Generator[tuple[str, tuple[str, str, bool]], None, list[PlannedJob]]:
+        deferred: list[PlannedJob] = []
+        for job in jobs:
+            if job.estimated_size is None or job.estimated_size == 0:
+                yield job.key, job.url
+            elif self.max_file_size is not None and job.estimated_size > self.max_file_size:
+                MessageHandler.error(f"Entry {job.url[1]} is about {job.estimated_size / (1024 * 1024):.1f}MB, above max_download_size. Skipping...")
+                self.pipeline.finish_job(job.key, job.url)
+            elif self.disk_budget.try_reserve(job.key, job.url, job.estimated_size):
+                yield job.key, job.url
+            elif not self.disk_budget.has_reservations():
+                MessageHandler.error(f"Entry {job.url[1]} is about {job.estimated_size / (1024 * 1024):.1f}MB and does not fit in the free space left in the save directory. Skipping...")
+            else:
+                if not job.is_deferred:
+                    MessageHandler.alert(f"Entry {job.url[1]} does not fit in the free space left in the save directory yet. Deferring until running downloads finish...")
+                    job.is_deferred = True
+                deferred.append(job)
+        return deferred
@@ -0,0 +1,415 @@
+import http.server
+import itertools
+import json
+import queue
+import threading
+import time
+from collections.abc import Callable
+from urllib.parse import parse_qs, urlsplit
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.downloaders import BaseDownloader
+from DownloadManager.downloaders.journal import JOB_QUEUED
+from DownloadManager.downloaders.pipeline import DownloadPipeline
+from DownloadManager.downloaders.routing import UrlRouter
+from DownloadManager.ingestion import route_url
+
+URL_QUEUED = 'queued'
+URL_DOWNLOADING = 'downloading'
+URL_PROCESSING = 'processing'
+URL_DONE = 'done'
+URL_FAILED = 'failed'
+URL_CANCELLED = 'cancelled'
+FINISHED_URL_STATES = (URL_DONE, URL_FAILED, URL_CANCELLED)
+JOB_STATE_QUEUED = 'queued'
+JOB_STATE_RUNNING = 'running'
+JOB_STATE_FINISHED = 'finished'
+JOB_STATE_CANCELLED = 'cancelled'
+EVENT_QUEUE_SIZE = 1000
+PROGRESS_EVENT_SECONDS = 1.0
+MAX_REQUEST_SIZE = 1024 * 1024
+JSON_CONTENT_TYPE = 'application/json'
+
+
+class UrlEntry:
+    def __init__(self, platform: str, url: tuple[str, str, bool]):
+        self.platform = platform
+        self.url = url
+        self.state = URL_QUEUED
+
+    def to_dict(self) -> dict:
+        return {'platform': self.platform, 'url': self.url[0], 'code': self.url[1], 'is_playlist': self.url[2], 'state': self.state}
+
+
+class ServiceJob:
+    def __init__(self, job_id: int, entries: list[UrlEntry], rejected: list[str]):
+        self.job_id = job_id
+        self.entries = entries
+        self.rejected = rejected
+        self.created = time.time()
+        self.is_cancelled = False
+
+    def state(self) -> str:
+        if all(entry.state in FINISHED_URL_STATES for entry in self.entries):
+            return JOB_STATE_CANCELLED if self.is_cancelled else JOB_STATE_FINISHED
+        if all(entry.state == URL_QUEUED for entry in self.entries):
+            return JOB_STATE_QUEUED
+        return JOB_STATE_RUNNING
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.job_id,
+            'state': self.state(),
+            'created': self.created,
+            'entries': [entry.to_dict() for entry in self.entries],
+            'rejected': self.rejected,
+        }
+
+
+class EventBroadcaster:
+    def __init__(self):
+        self._subscribers: list[queue.Queue] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        subscriber: queue.Queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.remove(subscriber)
+
+    def publish(self, event: dict):
+        event['time'] = time.time()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def close(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(None)
+            except queue.Full:
+                pass
+
+
+class JobRegistry:
+    def __init__(self, events: EventBroadcaster):
+        self.events = events
+        self._jobs: dict[int, ServiceJob] = {}
+        self._active: dict[tuple[str, str, bool], tuple[ServiceJob, UrlEntry]] = {}
+        self._downloading_codes: dict[str, int] = {}
+        self._progress_published: dict[str, float] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, urls: list[tuple[str, tuple[str, str, bool]]], rejected: list[str]) -> tuple[ServiceJob, list[tuple[str, tuple[str, str, bool]]]]:
+        accepted: list[tuple[str, tuple[str, str, bool]]] = []
+        with self._lock:
+            job = ServiceJob(next(self._job_ids), [], rejected)
+            for platform, url in urls:
+                key = (platform, url[1], url[2])
+                if key in self._active:
+                    job.rejected.append(f"{url[0]} is already queued in job {self._active[key][0].job_id}")
+                    continue
+                entry = UrlEntry(platform, url)
+                job.entries.append(entry)
+                self._active[key] = (job, entry)
+                accepted.append((platform, url))
+            self._jobs[job.job_id] = job
+            job_dict = job.to_dict()
+        self.events.publish({'type': 'job_submitted', 'job': job_dict})
+        return job, accepted
+
+    def get(self, job_id: int) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [{'id': job.job_id, 'state': job.state(), 'created': job.created, 'entry_count': len(job.entries)} for job in self._jobs.values()]
+
+    def cancel(self, job_id: int) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.is_cancelled = True
+            for entry in job.entries:
+                if entry.state == URL_QUEUED:
+                    entry.state = URL_CANCELLED
+            job_dict = job.to_dict()
+        self.events.publish({'type': 'job_cancelled', 'job': job_dict})
+        return job_dict
+
+    def cancel_queued(self):
+        with self._lock:
+            job_ids = [job.job_id for job in self._jobs.values() if job.state() in (JOB_STATE_QUEUED, JOB_STATE_RUNNING)]
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def start_url(self, platform: str, url: tuple[str, str, bool]) -> bool:
+        with self._lock:
+            active = self._active.get((platform, url[1], url[2]))
+            if active is None:
+                return True
+            job, entry = active
+            if entry.state == URL_CANCELLED:
+                del self._active[(platform, url[1], url[2])]
+                return False
+            entry.state = URL_DOWNLOADING
+            self._downloading_codes[url[1]] = job.job_id
+            event = {'type': 'url_started', 'job_id': job.job_id, 'entry': entry.to_dict()}
+        self.events.publish(event)
+        return True
+
+    def finish_download(self, platform: str, url: tuple[str, str, bool], is_downloaded: bool):
+        with self._lock:
+            self._downloading_codes.pop(url[1], None)
+            active = self._active.get((platform, url[1], url[2]))
+            if active is None or active[1].state != URL_DOWNLOADING:
+                return
+        self._update_entry(platform, url[1], url[2], URL_PROCESSING if is_downloaded else URL_FAILED)
+
+    def finish_entry(self, platform: str, code: str, is_playlist: bool, success: bool):
+        self._update_entry(platform, code, is_playlist, URL_DONE if success else URL_FAILED)
+
+    def progress_hook(self, d: dict):
+        key = d.get('filename') or d.get('tmpfilename') or ''
+        now = time.monotonic()
+        if d['status'] == 'downloading' and now - self._progress_published.get(key, 0.0) < PROGRESS_EVENT_SECONDS:
+            return
+        info = d.get('info_dict') or {}
+        with self._lock:
+            job_id = self._downloading_codes.get(info.get('playlist_id')) or self._downloading_codes.get(info.get('id'))
+            if d['status'] == 'downloading':
+                self._progress_published[key] = now
+            else:
+                self._progress_published.pop(key, None)
+        self.events.publish({
+            'type': 'progress',
+            'job_id': job_id,
+            'status': d['status'],
+            'code': info.get('id'),
+            'title': info.get('title'),
+            'downloaded_bytes': d.get('downloaded_bytes'),
+            'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate'),
+            'speed': d.get('speed'),
+        })
+
+    def _update_entry(self, platform: str, code: str, is_playlist: bool, state: str):
+        with self._lock:
+            active = self._active.get((platform, code, is_playlist))
+            if active is None:
+                return
+            job, entry = active
+            entry.state = state
+            if state in FINISHED_URL_STATES:
+                del self._active[(platform, code, is_playlist)]
+            is_finished = job.state() in (JOB_STATE_FINISHED, JOB_STATE_CANCELLED)
+            event = {'type': 'url_updated', 'job_id': job.job_id, 'entry': entry.to_dict()}
+            job_dict = job.to_dict() if is_finished else None
+        self.events.publish(event)
+        if job_dict is not None:
+            self.events.publish({'type': 'job_finished', 'job': job_dict})
+
+
+class JobUrlQueue(queue.Queue):
+    def __init__(self, registry: JobRegistry, platform: str, pipeline: DownloadPipeline):
+        super().__init__()
+        self._registry = registry
+        self._platform = platform
+        self._pipeline = pipeline
+        self.is_closed = False
+
+    def get(self, block=True, timeout=None):
+        while True:
+            url = super().get(block, timeout)
+            if url is None or self._registry.start_url(self._platform, url):
+                return url
+            if not self.is_closed:
+                self._pipeline.finish_job(self._platform, url)
+
+
+class DownloadService:
+    def __init__(self, downloaders: dict[str, BaseDownloader], pipeline: DownloadPipeline, registry: JobRegistry):
+        self.downloaders = downloaders
+        self.router = UrlRouter(downloaders)
+        self.pipeline = pipeline
+        self.registry = registry
+        self._url_queues: dict[str, JobUrlQueue] = {}
+        self._workers: list[threading.Thread] = []
+        self._stopped = threading.Event()
+        for key, downloader in downloaders.items():
+            self._url_queues[key] = JobUrlQueue(registry, key, pipeline)
+            self._workers.append(threading.Thread(
+                target=downloader.download_and_index,
+                args=(self._url_queues[key], pipeline),
+                name=f"{downloader.platform}-service",
+                daemon=True))
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, lines: list[str]) -> dict:
+        urls: list[tuple[str, tuple[str, str, bool]]] = []
+        rejected: list[str] = []
+        for line in lines:
+            route_result = route_url(line.strip(), self.router)
+            if route_result is None:
+                rejected.append(f"{line} is not a valid URL")
+            else:
+                urls.append(route_result)
+        return self.submit_urls(urls, rejected)
+
+    def submit_urls(self, urls: list[tuple[str, tuple[str, str, bool]]], rejected: list[str]) -> dict:
+        job, accepted = self.registry.submit(urls, rejected)
+        for key, url in accepted:
+            self.pipeline.record_job(key, url, JOB_QUEUED)
+            self._url_queues[key].put(url)
+        return self.registry.get(job.job_id)
+
+    def stop(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        for url_queue in self._url_queues.values():
+            url_queue.is_closed = True
+        self.registry.cancel_queued()
+        for url_queue in self._url_queues.values():
+            url_queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self.registry.events.close()
+
+
+def create_request_handler(service: DownloadService, shutdown: Callable[[], None]) -> type[http.server.BaseHTTPRequestHandler]:
+    class ServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not self._check_request(False):
+                return
+            path, query = self._split_path()
+            if path == ['jobs']:
+                self._send_json(200, {'jobs': service.registry.list()})
+            elif len(path) == 2 and path[0] == 'jobs':
+                self._send_job(service.registry.get(self._read_job_id(path[1])))
+            elif path == ['events']:
+                self._stream_events(self._read_job_id(query.get('job', [''])[0]))
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self._check_request(True):
+                return
+            path, _ = self._split_path()
+            if path == ['jobs']:
+                body = self._read_json()
+                if not isinstance(body, dict) or not isinstance(body.get('urls'), list) or not all(isinstance(url, str) for url in body['urls']):
+                    self._send_json(400, {'error': 'expected a JSON object with a list of URL strings under "urls"'})
+                    return
+                self._send_json(201, service.submit(body['urls']))
+            elif path == ['shutdown']:
+                self._send_json(202, {'state': 'stopping'})
+                threading.Thread(target=shutdown, name="service-shutdown", daemon=True).start()
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_DELETE(self):
+            if not self._check_request(True):
+                return
+            path, _ = self._split_path()
+            if len(path) == 2 and path[0] == 'jobs':
+                self._send_job(service.registry.cancel(self._read_job_id(path[1])))
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def log_message(self, format, *args):
+            pass
+
+        def _check_request(self, is_json_required: bool) -> bool:
+            port = self.server.server_address[1]
+            if self.headers.get('Host') not in (f"127.0.0.1:{port}", f"localhost:{port}"):
+                self._send_json(403, {'error': f"the Host header must be 127.0.0.1:{port} or localhost:{port}"})
+                return False
+            if is_json_required and self.headers.get_content_type() != JSON_CONTENT_TYPE:
+                self._send_json(415, {'error': f"the Content-Type header must be {JSON_CONTENT_TYPE}"})
+                return False
+            return True
+
+        def _split_path(self) -> tuple[list[str], dict[str, list[str]]]:
+            parts = urlsplit(self.path)
+            return [part for part in parts.path.split('/') if part], parse_qs(parts.query)
+
+        @staticmethod
+        def _read_job_id(text: str) -> int | None:
+            return int(text) if text.isdigit() else None
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_REQUEST_SIZE:
+                return None
+            try:
+                return json.loads(self.rfile.read(length) or b'null')
+            except ValueError:
+                return None
+
+        def _send_job(self, job: dict | None):
+            if job is None:
+                self._send_json(404, {'error': 'job not found'})
+            else:
+                self._send_json(200, job)
+
+        def _send_json(self, status: int, body: dict):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', JSON_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream_events(self, job_id: int | None):
+            subscriber = service.registry.events.subscribe()
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                while True:
+                    event = subscriber.get()
+                    if event is None:
+                        return
+                    if job_id is not None and event.get('job_id', event.get('job', {}).get('id')) != job_id:
+                        continue
+                    self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                    self.wfile.flush()
+            except OSError:
+                pass
+            finally:
+                service.registry.events.unsubscribe(subscriber)
+
+    return ServiceRequestHandler
+
+
+def run_service(service: DownloadService, port: int):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), create_request_handler(service, lambda: server.shutdown()))
+    server.daemon_threads = True
+    service.start()
+    MessageHandler.success(f"Download service is listening on http://127.0.0.1:{server.server_address[1]}. Press CTRL+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    MessageHandler.info("Stopping the download service. Waiting for running downloads to finish, queued ones are resumed on the next start...")
+    service.stop()
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.fixtures import generate_fixtures
+
+DEFAULT_TOLERANCE = 0.15
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: list[float], rank: int) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(rank / 100 * (len(ordered) - 1)))]
+
+
+def peak_rss_mib() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+
+
+def run_scenario(arguments: argparse.Namespace):
+    from benchmarks.scenarios import ScenarioContext, SkippedScenario, scenarios
+    fixtures = generate_fixtures(arguments.fixtures_dir, arguments.progressive, arguments.hls, arguments.duration)
+    path_to_work_dir = tempfile.mkdtemp(prefix='download-manager-benchmark-')
+    try:
+        result = scenarios[arguments.run_scenario](ScenarioContext(path_to_work_dir, arguments.fixtures_dir, fixtures, arguments.concurrency))
+        report = {
+            'operations': result.operation_count,
+            'seconds': result.seconds,
+            'throughput': result.amount / result.seconds if result.seconds > 0 else None,
+            'unit': f'{result.unit}/s',
+            **{f'p{rank}': percentile(result.latencies, rank) for rank in PERCENTILES},
+            'peak_rss_mib': peak_rss_mib(),
+        }
+    except SkippedScenario as e:
+        report = {'skipped': str(e)}
+    finally:
+        shutil.rmtree(path_to_work_dir, ignore_errors=True)
+    with open(arguments.result_file, 'w', encoding='utf-8') as result_file:
+        json.dump(report, result_file)
+
+
+def run_in_subprocess(name: str, arguments: argparse.Namespace) -> dict:
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as result_file:
+        path_to_result = result_file.name
+    try:
+        completed = subprocess.run([
+            sys.executable, '-m', 'benchmarks', '--run-scenario', name, '--result-file', path_to_result,
+            '--fixtures-dir', arguments.fixtures_dir, '--progressive', str(arguments.progressive), '--hls', str(arguments.hls),
+            '--duration', str(arguments.duration), '--concurrency', str(arguments.concurrency)],
+            stdout=None if arguments.verbose else subprocess.DEVNULL, stderr=None if arguments.verbose else subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            return {'failed': (completed.stderr or '').strip().splitlines()[-1:] or ['exit code ' + str(completed.returncode)]}
+        with open(path_to_result, encoding='utf-8') as result_file:
+            return json.load(result_file)
+    finally:
+        os.remove(path_to_result)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    if 'throughput' not in report or 'throughput' not in baseline:
+        return []
+    regressions: list[str] = []
+    if report['throughput'] is not None and baseline['throughput'] and report['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput']:.2f} < baseline {baseline['throughput']:.2f} {report['unit']}")
+    if report['p95'] is not None and baseline['p95'] and report['p95'] > baseline['p95'] * (1 + tolerance):
+        regressions.append(f"p95 latency {report['p95'] * 1000:.3f}ms > baseline {baseline['p95'] * 1000:.3f}ms")
+    return regressions
+
+
+def format_report(name: str, report: dict) -> str:
+    if 'skipped' in report:
+        return f"{name:<22} skipped: {report['skipped']}"
+    if 'failed' in report:
+        return f"{name:<22} failed: {' '.join(report['failed'])}"
+    latencies = ' '.join(f"p{rank}={report[f'p{rank}'] * 1000:.3f}ms" for rank in PERCENTILES if report[f'p{rank}'] is not None)
+    peak_rss = f"{report['peak_rss_mib']:.1f}MiB" if report['peak_rss_mib'] is not None else 'n/a'
+    return f"{name:<22} {report['throughput']:>12.2f} {report['unit']:<16} {latencies}  peak RSS {peak_rss}"
+
+
+def parse_arguments() -> argparse.Namespace:
+    from benchmarks.scenarios import scenarios
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline benchmarks of Download Manager.")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"scenarios to run, all by default: {', '.join(scenarios)}")
+    parser.add_argument('--fixtures-dir', default=os.path.join(tempfile.gettempdir(), 'download-manager-benchmark-fixtures'),
+                        help="directory for generated fixtures, reused between runs")
+    parser.add_argument('--progressive', type=int, default=8, help="number of progressive video fixtures")
+    parser.add_argument('--hls', type=int, default=4, help="number of HLS video fixtures")
+    parser.add_argument('--duration', type=int, default=10, help="fixture length in seconds")
+    parser.add_argument('--concurrency', type=int, default=2, help="concurrent downloads and encode workers")
+    parser.add_argument('--baseline', help="baseline results file saved on this machine to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results to the --baseline file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown before reporting a regression")
+    parser.add_argument('--verbose', action='store_true', help="show the output of the benchmarked code")
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    for name in arguments.scenarios:
+        if name not in scenarios:
+            parser.error(f"unknown scenario {name}, choose from: {', '.join(scenarios)}")
+    if arguments.save_baseline and arguments.baseline is None:
+        parser.error("--save-baseline needs --baseline with the file to save the results to")
+    return arguments
+
+
+def main():
+    arguments = parse_arguments()
+    if arguments.run_scenario is not None:
+        run_scenario(arguments)
+        return
+    from benchmarks.scenarios import scenarios
+    generate_fixtures(arguments.fixtures_dir, arguments.progressive, arguments.hls, arguments.duration)
+    baseline: dict = {}
+    if arguments.baseline is not None and os.path.exists(arguments.baseline):
+        with open(arguments.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    results: dict[str, dict] = {}
+    regression_count = 0
+    for name in arguments.scenarios or scenarios:
+        results[name] = run_in_subprocess(name, arguments)
+        print(format_report(name, results[name]), flush=True)
+        for regression in compare(results[name], baseline.get(name, {}), arguments.tolerance):
+            print(f"{'':<22} REGRESSION: {regression}", flush=True)
+            regression_count += 1
+    if arguments.save_baseline:
+        with open(arguments.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump({**baseline, **{name: report for name, report in results.items() if 'throughput' in report}}, baseline_file, indent=2)
+        print(f"Baseline saved to {arguments.baseline}")
+    if regression_count > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
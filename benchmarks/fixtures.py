@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import subprocess
+
+SEGMENT_SECONDS = 2
+SYNTHETIC_BYTE_RATE = 250_000
+
+
+class Fixture:
+    def __init__(self, code: str, title: str, duration: float, kind: str, path_to_file: str, size: int):
+        self.code = code
+        self.title = title
+        self.duration = duration
+        self.kind = kind
+        self.path_to_file = path_to_file
+        self.size = size
+
+
+def has_ffmpeg() -> bool:
+    return shutil.which('ffmpeg') is not None
+
+
+def generate_fixtures(path_to_fixture_dir: str, progressive_count: int, hls_count: int, duration: int) -> list[Fixture]:
+    os.makedirs(os.path.join(path_to_fixture_dir, 'media'), exist_ok=True)
+    os.makedirs(os.path.join(path_to_fixture_dir, 'info'), exist_ok=True)
+    is_real_media = has_ffmpeg()
+    fixtures: list[Fixture] = []
+    for i in range(progressive_count):
+        code = f'progressive{i:04d}'
+        path_to_file = os.path.join(path_to_fixture_dir, 'media', f'{code}.mp4')
+        if not os.path.exists(path_to_file):
+            if is_real_media:
+                _generate_media(path_to_file, duration, 440 + i)
+            else:
+                _generate_bytes(path_to_file, duration * SYNTHETIC_BYTE_RATE, i)
+        fixtures.append(Fixture(code, f'Progressive fixture {i}', duration, 'progressive', path_to_file, os.path.getsize(path_to_file)))
+    for i in range(hls_count):
+        code = f'hls{i:04d}'
+        path_to_hls_dir = os.path.join(path_to_fixture_dir, 'media', code)
+        path_to_playlist = os.path.join(path_to_hls_dir, 'index.m3u8')
+        if not os.path.exists(path_to_playlist):
+            os.makedirs(path_to_hls_dir, exist_ok=True)
+            if is_real_media:
+                _generate_hls(path_to_hls_dir, duration, 880 + i)
+            else:
+                _generate_synthetic_hls(path_to_hls_dir, duration, i)
+        size = sum(os.path.getsize(os.path.join(path_to_hls_dir, name)) for name in os.listdir(path_to_hls_dir) if name.endswith('.ts'))
+        fixtures.append(Fixture(code, f'HLS fixture {i}', duration, 'hls', path_to_playlist, size))
+    for fixture in fixtures:
+        with open(os.path.join(path_to_fixture_dir, 'info', f'{fixture.code}.json'), 'w', encoding='utf-8') as info_file:
+            json.dump({
+                'id': fixture.code,
+                'title': fixture.title,
+                'uploader': 'Benchmark',
+                'duration': fixture.duration,
+                'kind': fixture.kind,
+                'path': os.path.relpath(fixture.path_to_file, path_to_fixture_dir).replace(os.sep, '/'),
+                'filesize': fixture.size,
+            }, info_file)
+    return fixtures
+
+
+def _run_ffmpeg(args: list[str]):
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', *args], stdin=subprocess.DEVNULL, capture_output=True, check=True)
+
+
+def _generate_media(path_to_file: str, duration: int, frequency: int):
+    _run_ffmpeg([
+        '-f', 'lavfi', '-i', f'testsrc2=size=640x360:rate=30:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency={frequency}:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(30 * SEGMENT_SECONDS),
+        '-c:a', 'aac', '-b:a', '128k', '-shortest', path_to_file])
+
+
+def _generate_hls(path_to_hls_dir: str, duration: int, frequency: int):
+    path_to_source = os.path.join(path_to_hls_dir, 'source.mp4')
+    _generate_media(path_to_source, duration, frequency)
+    _run_ffmpeg([
+        '-i', path_to_source, '-c', 'copy', '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(path_to_hls_dir, 's%04d.ts'), os.path.join(path_to_hls_dir, 'index.m3u8')])
+    os.remove(path_to_source)
+
+
+def _generate_bytes(path_to_file: str, size: int, seed: int):
+    block = bytes((seed + i) % 256 for i in range(4096))
+    with open(path_to_file, 'wb') as media_file:
+        for _ in range(size // len(block)):
+            media_file.write(block)
+
+
+def _generate_synthetic_hls(path_to_hls_dir: str, duration: int, seed: int):
+    segment_count = max(1, duration // SEGMENT_SECONDS)
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}', '#EXT-X-MEDIA-SEQUENCE:0']
+    for i in range(segment_count):
+        _generate_bytes(os.path.join(path_to_hls_dir, f's{i:04d}.ts'), SEGMENT_SECONDS * SYNTHETIC_BYTE_RATE, seed + i)
+        lines += [f'#EXTINF:{SEGMENT_SECONDS}.0,', f's{i:04d}.ts']
+    lines.append('#EXT-X-ENDLIST')
+    with open(os.path.join(path_to_hls_dir, 'index.m3u8'), 'w', encoding='utf-8') as playlist_file:
+        playlist_file.write('\n'.join(lines) + '\n')
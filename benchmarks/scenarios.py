@@ -0,0 +1,181 @@
+import os
+import queue
+import random
+import shutil
+import time
+from collections.abc import Callable
+
+from DownloadManager.message_handler import MessageHandler
+from DownloadManager.downloaders.downloaders import Indexer, create_downloaders
+from DownloadManager.downloaders.routing import UrlRouter
+from DownloadManager.downloaders.fragments import FragmentConcurrencyController
+from DownloadManager.downloaders.metrics import JobMetrics, MetricsRecorder
+from DownloadManager.downloaders.pipeline import DownloadPipeline, PipelineJob, TranscodeStage
+from DownloadManager.downloaders.transcoding import TranscodeProfile, probe_media
+from benchmarks.fixtures import Fixture, has_ffmpeg
+from benchmarks.stub import FIXTURE_KEY, FixtureDownloader, FixtureServer, installed_fixture_extractor
+
+URL_COUNT = 200_000
+INDEX_LINE_COUNT = 100_000
+INDEXING_FORMAT = '[DATE] [PLATFORM]: [URL] - [TITLE] - [ARTIST_LIST]'
+
+
+class ScenarioResult:
+    def __init__(self, operation_count: int, seconds: float, latencies: list[float], unit: str = 'ops', amount: float | None = None):
+        self.operation_count = operation_count
+        self.seconds = seconds
+        self.latencies = latencies
+        self.unit = unit
+        self.amount = amount if amount is not None else float(operation_count)
+
+
+class SkippedScenario(Exception):
+    pass
+
+
+class ScenarioContext:
+    def __init__(self, path_to_work_dir: str, path_to_fixture_dir: str, fixtures: list[Fixture], concurrency: int):
+        self.path_to_work_dir = path_to_work_dir
+        self.path_to_fixture_dir = path_to_fixture_dir
+        self.fixtures = fixtures
+        self.concurrency = concurrency
+
+
+class CollectingMetricsRecorder(MetricsRecorder):
+    def __init__(self):
+        super().__init__(None)
+        self.jobs: list[JobMetrics] = []
+
+    def record(self, metrics: JobMetrics):
+        self.jobs.append(metrics)
+
+
+def sample_urls(count: int, seed: int = 7) -> list[str]:
+    generator = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'
+    urls: list[str] = []
+    for i in range(count):
+        choice = i % 5
+        if choice == 0:
+            urls.append(f"https://www.youtube.com/watch?v={''.join(generator.choices(alphabet, k=11))}")
+        elif choice == 1:
+            urls.append(f"https://www.youtube.com/watch?v={''.join(generator.choices(alphabet, k=11))}&list=PL{''.join(generator.choices(alphabet, k=32))}&index=3")
+        elif choice == 2:
+            urls.append(f"https://www.twitch.tv/videos/{generator.randrange(10 ** 9, 10 ** 10)}?t=1h2m3s")
+        elif choice == 3:
+            urls.append(f"https://www.twitch.tv/videos/{generator.randrange(10 ** 9, 10 ** 10)}")
+        else:
+            urls.append(f"https://www.example.com/watch?v={''.join(generator.choices(alphabet, k=11))}")
+    return urls
+
+
+def run_url_routing(context: ScenarioContext) -> ScenarioResult:
+    router = UrlRouter(_create_downloaders(context.path_to_work_dir))
+    urls = sample_urls(URL_COUNT)
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for url in urls:
+        url_started = time.perf_counter()
+        router.route(url)
+        latencies.append(time.perf_counter() - url_started)
+    return ScenarioResult(len(urls), time.perf_counter() - started, latencies)
+
+
+def run_indexer(context: ScenarioContext) -> ScenarioResult:
+    indexer = Indexer(os.path.join(context.path_to_work_dir, 'index.txt'), INDEXING_FORMAT, flush_every=100, flush_interval=1.0)
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for i in range(INDEX_LINE_COUNT):
+        line_started = time.perf_counter()
+        indexer.append_to_index(f'https://www.youtube.com/watch?v={i:011d}', f'Title {i}', ['Artist A', 'Artist B'], 'Youtube')
+        latencies.append(time.perf_counter() - line_started)
+    indexer.close()
+    return ScenarioResult(INDEX_LINE_COUNT, time.perf_counter() - started, latencies)
+
+
+def run_download_progressive(context: ScenarioContext) -> ScenarioResult:
+    return _run_download(context, 'progressive', None)
+
+
+def run_download_hls(context: ScenarioContext) -> ScenarioResult:
+    return _run_download(context, 'hls', {'fixture': 8})
+
+
+def run_encode_h264(context: ScenarioContext) -> ScenarioResult:
+    return _run_encode(context, TranscodeProfile('mkv', 'libx264', '128', '28', 'veryfast'))
+
+
+def run_encode_h265(context: ScenarioContext) -> ScenarioResult:
+    return _run_encode(context, TranscodeProfile('mkv', 'libx265', '128', '28', 'veryfast'))
+
+
+def run_encode_audio(context: ScenarioContext) -> ScenarioResult:
+    return _run_encode(context, TranscodeProfile('opus', None, '128'))
+
+
+def _create_downloaders(path_to_work_dir: str) -> dict:
+    return create_downloaders(False, MessageHandler, lambda d: None, False, '28', 'fast', False, '1080', '128', None, path_to_work_dir, {})
+
+
+def _run_download(context: ScenarioContext, kind: str, max_fragment_downloads: dict[str, int] | None) -> ScenarioResult:
+    fixtures = [fixture for fixture in context.fixtures if fixture.kind == kind]
+    if not fixtures:
+        raise SkippedScenario(f"no {kind} fixtures were generated")
+    with FixtureServer(context.path_to_fixture_dir) as server, installed_fixture_extractor():
+        downloader = FixtureDownloader(
+            server.base_url, False, MessageHandler, lambda d: None, True, '28', 'fast', False, None, '128', None,
+            context.path_to_work_dir, context.concurrency, convert_downloads=False)
+        indexer = Indexer(os.path.join(context.path_to_work_dir, 'index.txt'), INDEXING_FORMAT)
+        metrics = CollectingMetricsRecorder()
+        fragment_controller = FragmentConcurrencyController(max_fragment_downloads) if max_fragment_downloads is not None else None
+        pipeline = DownloadPipeline(indexer, 1, fragment_controller=fragment_controller, metrics=metrics)
+        router = UrlRouter({FIXTURE_KEY: downloader})
+        url_queue: queue.Queue = queue.Queue()
+        for fixture in fixtures:
+            url_queue.put(router.route(server.watch_url(fixture.code))[1])
+        url_queue.put(None)
+        started = time.perf_counter()
+        pipeline.start()
+        downloader.download_and_index(url_queue, pipeline)
+        pipeline.finish()
+        seconds = time.perf_counter() - started
+        indexer.close()
+    latencies = [(job.metadata_seconds or 0.0) + (job.download_seconds or 0.0) + (job.index_seconds or 0.0) for job in metrics.jobs if job.success]
+    if len(latencies) != len(fixtures):
+        raise RuntimeError(f"only {len(latencies)} of {len(fixtures)} fixtures were downloaded")
+    return ScenarioResult(len(fixtures), seconds, latencies, 'MiB', sum(job.bytes_downloaded or 0 for job in metrics.jobs) / (1024 * 1024))
+
+
+def _run_encode(context: ScenarioContext, profile: TranscodeProfile) -> ScenarioResult:
+    if not has_ffmpeg():
+        raise SkippedScenario("FFmpeg is not installed")
+    sources = [fixture for fixture in context.fixtures if fixture.kind == 'progressive']
+    if not sources or probe_media(sources[0].path_to_file) is None:
+        raise SkippedScenario("no decodable progressive fixtures")
+    output_queue: queue.Queue = queue.Queue()
+    stage = TranscodeStage(output_queue, context.concurrency * 4, None, stream_copy=False)
+    latencies: list[float] = []
+    media_seconds = 0.0
+    started = time.perf_counter()
+    for fixture in sources:
+        path_to_copy = os.path.join(context.path_to_work_dir, os.path.basename(fixture.path_to_file))
+        shutil.copyfile(fixture.path_to_file, path_to_copy)
+        job = PipelineJob('Fixture', fixture.code, fixture.code, fixture.title, 'Benchmark', path_to_copy, profile)
+        job_started = time.perf_counter()
+        if not stage.transcode(job):
+            raise RuntimeError(f"failed to encode {fixture.code}")
+        latencies.append(time.perf_counter() - job_started)
+        media_seconds += fixture.duration
+        os.remove(job.path_to_file)
+    return ScenarioResult(len(sources), time.perf_counter() - started, latencies, 'media seconds', media_seconds)
+
+
+scenarios: dict[str, Callable[[ScenarioContext], ScenarioResult]] = {
+    'url_routing': run_url_routing,
+    'indexer': run_indexer,
+    'download_progressive': run_download_progressive,
+    'download_hls': run_download_hls,
+    'encode_h264': run_encode_h264,
+    'encode_h265': run_encode_h265,
+    'encode_audio': run_encode_audio,
+}
@@ -0,0 +1,108 @@
+import functools
+import http.server
+import threading
+from contextlib import contextmanager
+
+from yt_dlp import YoutubeDL
+from yt_dlp.extractor.common import InfoExtractor
+
+from DownloadManager.downloaders.downloaders import EmbeddedVideoMetadataDownloader
+
+FIXTURE_KEY = 'Fixture'
+
+
+class FixtureRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    def __init__(self, path_to_fixture_dir: str):
+        self._server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), functools.partial(FixtureRequestHandler, directory=path_to_fixture_dir))
+        self._server.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+
+    def __enter__(self) -> 'FixtureServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def watch_url(self, code: str) -> str:
+        return f'{self.base_url}/watch/{code}'
+
+
+class FixtureIE(InfoExtractor):
+    IE_NAME = 'fixture'
+    _VALID_URL = r'(?P<base>http://127\.0\.0\.1:\d+)/watch/(?P<id>[\w-]+)'
+
+    def _real_extract(self, url):
+        base, video_id = self._match_valid_url(url).group('base', 'id')
+        info = self._download_json(f'{base}/info/{video_id}.json', video_id)
+        media_url = f"{base}/{info['path']}"
+        if info['kind'] == 'hls':
+            formats = [{'format_id': 'hls', 'url': media_url, 'protocol': 'm3u8_native', 'ext': 'mp4', 'filesize_approx': info['filesize']}]
+        else:
+            formats = [{'format_id': 'mp4', 'url': media_url, 'ext': 'mp4', 'filesize': info['filesize']}]
+        return {
+            'id': video_id,
+            'title': info['title'],
+            'uploader': info['uploader'],
+            'duration': info['duration'],
+            'formats': formats,
+        }
+
+
+@contextmanager
+def installed_fixture_extractor():
+    add_default_info_extractors = YoutubeDL.add_default_info_extractors
+
+    def add_fixture_first(ydl):
+        ydl.add_info_extractor(FixtureIE())
+        add_default_info_extractors(ydl)
+
+    YoutubeDL.add_default_info_extractors = add_fixture_first
+    try:
+        yield
+    finally:
+        YoutubeDL.add_default_info_extractors = add_default_info_extractors
+
+
+class FixtureDownloader(EmbeddedVideoMetadataDownloader):
+    def __init__(self, base_url: str, *args, **kwargs):
+        self._url_scheme = f'{base_url}/watch/'
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def validate_video_part(video_part: str) -> bool:
+        return len(video_part) > 0 and all(char.isalnum() or char in '-_' for char in video_part)
+
+    @staticmethod
+    def validate_playlist(playlist_part: str) -> bool:
+        return False
+
+    @property
+    def url_scheme(self):
+        return self._url_scheme
+
+    @property
+    def url_routes(self) -> dict[str, str]:
+        return {'127.0.0.1': r'/watch/(?P<video>[^/]+)'}
+
+    def canonical_url(self, code: str, is_playlist: bool, video: str | None = None) -> str:
+        return f'{self.url_scheme}{code}'
+
+    @property
+    def platform(self):
+        return FIXTURE_KEY
+
+    @property
+    def extractor_names(self) -> list[str]:
+        return ['fixture']
+
+    def get_sample_urls(self) -> list[str]:
+        return [f'{self.url_scheme}[VIDEO_CODE]']
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+from DownloadManager.downloaders.index_store import IndexStore, import_index_file
+
+PLAYLIST = 'https://www.youtube.com/playlist?list=PLsynced'
+
+
+class ImportIndexFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = IndexStore(os.path.join(self.directory.name, 'index.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_blocks_of_one_playlist_are_merged(self):
+        path_to_index_file = os.path.join(self.directory.name, 'index.txt')
+        with open(path_to_index_file, 'w') as index_file:
+            index_file.write(
+                f"PLAYLIST: Youtube: {PLAYLIST} - Synced:\n\ta1 - A1\n\n"
+                "c - C\n"
+                f"PLAYLIST: Youtube: {PLAYLIST} - Synced (renamed):\n\ta2 - A2\n\n")
+        self.assertEqual(import_index_file(self.store, path_to_index_file, '[URL] - [TITLE]'), (3, 0))
+        entries = self.store.search(playlist=PLAYLIST)
+        self.assertEqual(sorted((entry[2], entry[5]) for entry in entries), [('a1', 'Synced'), ('a2', 'Synced')])
+        self.assertEqual(self.store.search(playlist='Synced', limit=10), entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
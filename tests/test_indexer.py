@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from DownloadManager.downloaders.downloaders import Indexer
+
+FIRST = 'https://www.youtube.com/playlist?list=PLfirst'
+SECOND = 'https://www.youtube.com/playlist?list=PLsecond'
+
+
+class IndexerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path_to_index_file = os.path.join(self.directory.name, 'index.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def index(self, flush_every: int) -> str:
+        indexer = Indexer(self.path_to_index_file, '[URL] - [TITLE]', '2026-01-01', flush_every, 3600.0)
+        indexer.append_playlist_entry_to_index(FIRST, 'First', 'a1', 'A1', 'Up', 'Youtube')
+        indexer.append_playlist_entry_to_index(SECOND, 'Second', 'b1', 'B1', 'Up', 'Youtube')
+        indexer.append_to_index('c', 'C', ['Up'], 'Youtube')
+        indexer.append_playlist_entry_to_index(FIRST, 'First', 'a2', 'A2', 'Up', 'Youtube')
+        indexer.close_playlist_block(FIRST)
+        indexer.append_playlist_entry_to_index(SECOND, 'Second', 'b2', 'B2', 'Up', 'Youtube')
+        indexer.close_playlist_block(SECOND)
+        indexer.close()
+        with open(self.path_to_index_file) as index_file:
+            return index_file.read()
+
+    def test_interleaved_playlists_are_written_as_contiguous_blocks(self):
+        self.assertEqual(self.index(100), (
+            "c - C\n"
+            f"PLAYLIST: Youtube: {FIRST} - First:\n\ta1 - A1\n\ta2 - A2\n\n"
+            f"PLAYLIST: Youtube: {SECOND} - Second:\n\tb1 - B1\n\tb2 - B2\n\n"))
+
+    def test_every_flushed_block_is_contiguous(self):
+        self.assertEqual(self.index(1), (
+            f"PLAYLIST: Youtube: {FIRST} - First:\n\ta1 - A1\n\n"
+            f"PLAYLIST: Youtube: {SECOND} - Second:\n\tb1 - B1\n\n"
+            "c - C\n"
+            f"PLAYLIST: Youtube: {FIRST} - First:\n\ta2 - A2\n\n"
+            f"PLAYLIST: Youtube: {SECOND} - Second:\n\tb2 - B2\n\n"))
+
+    def test_playlist_continues_its_block_across_flushes(self):
+        indexer = Indexer(self.path_to_index_file, '[URL] - [TITLE]', '2026-01-01', 1, 3600.0)
+        for code in ('a1', 'a2', 'a3'):
+            indexer.append_playlist_entry_to_index(FIRST, 'First', code, code.upper(), 'Up', 'Youtube')
+        indexer.close_playlist_block(FIRST)
+        indexer.append_to_index('c', 'C', ['Up'], 'Youtube')
+        indexer.close()
+        with open(self.path_to_index_file) as index_file:
+            self.assertEqual(index_file.read(), f"PLAYLIST: Youtube: {FIRST} - First:\n\ta1 - A1\n\ta2 - A2\n\ta3 - A3\n\nc - C\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
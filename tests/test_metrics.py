@@ -0,0 +1,20 @@
+import unittest
+
+from DownloadManager.downloaders.metrics import MetricsRecorder
+
+
+class MetricsRecorderTest(unittest.TestCase):
+    def test_failed_download_stats_are_discarded(self):
+        recorder = MetricsRecorder(None)
+        hook = recorder.progress_hook('worker-0')
+        hook({'status': 'finished', 'info_dict': {'id': 'submitted'}, 'total_bytes': 10, 'elapsed': 1.0})
+        hook({'status': 'downloading', 'info_dict': {'id': 'failed'}, 'speed': 5.0})
+        self.assertEqual(recorder.take_download_stats('submitted').bytes_downloaded, 10)
+        recorder.discard_download_stats('worker-0')
+        self.assertIsNone(recorder.take_download_stats('failed'))
+        self.assertEqual(recorder._downloads, {})
+        self.assertEqual(recorder._worker_downloads, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+from DownloadManager.downloaders.downloaders import create_downloaders, YOUTUBE_KEY, TWITCH_KEY
+from DownloadManager.downloaders.routing import UrlRouter
+from DownloadManager.message_handler import MessageHandler
+
+VIDEO = 'dQw4w9WgXcQ'
+WATCH_URL = f'https://www.youtube.com/watch?v={VIDEO}'
+
+
+class UrlRouterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.router = UrlRouter(create_downloaders(False, MessageHandler, None, False, '28', 'medium', False, '1080', '128', None, tempfile.gettempdir(), {}))
+
+    def assertRoutes(self, urls: list[str], expected: tuple[str, tuple[str, str, bool]]):
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.router.route(url), expected)
+
+    def test_video_variants(self):
+        self.assertRoutes([
+            WATCH_URL,
+            f'http://youtube.com/watch?feature=share&v={VIDEO}&t=3',
+            f'youtube.com/watch?v={VIDEO}',
+            f'https://m.youtube.com/watch?v={VIDEO}',
+            f'https://music.youtube.com/watch?v={VIDEO}',
+            f'HTTPS://WWW.YOUTUBE.COM/watch?v={VIDEO}#t=1',
+            f'https://youtu.be/{VIDEO}?si=abc',
+            f'https://www.youtube.com/shorts/{VIDEO}',
+            f'https://www.youtube.com/live/{VIDEO}',
+            f'https://www.youtube-nocookie.com/embed/{VIDEO}',
+        ], (YOUTUBE_KEY, (WATCH_URL, VIDEO, False)))
+
+    def test_playlist_variants(self):
+        self.assertRoutes([
+            'https://www.youtube.com/playlist?list=PLabc_-1',
+            f'https://www.youtube.com/watch?v={VIDEO}&list=PLabc_-1&index=3',
+        ], (YOUTUBE_KEY, ('https://www.youtube.com/playlist?list=PLabc_-1', 'PLabc_-1', True)))
+
+    def test_mix_keeps_the_watch_url(self):
+        mix = f'RD{VIDEO}'
+        self.assertRoutes([
+            f'https://www.youtube.com/watch?v={VIDEO}&list={mix}',
+            f'https://www.youtube.com/watch?v={VIDEO}&list={mix}&start_radio=1&index=2',
+            f'https://www.youtube.com/playlist?list={mix}',
+        ], (YOUTUBE_KEY, (f'{WATCH_URL}&list={mix}', mix, True)))
+
+    def test_mix_seeded_by_another_video(self):
+        self.assertRoutes([
+            'https://www.youtube.com/watch?v=aaaaaaaaaaa&list=RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs',
+        ], (YOUTUBE_KEY, ('https://www.youtube.com/watch?v=aaaaaaaaaaa&list=RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs', 'RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs', True)))
+
+    def test_mix_without_a_video_stays_a_playlist(self):
+        self.assertRoutes([
+            'https://music.youtube.com/playlist?list=RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs',
+        ], (YOUTUBE_KEY, ('https://www.youtube.com/playlist?list=RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs', 'RDCLAK5uy_kmPRjHDECIcuVwnKsx2Ng7fyNgFKWNJFs', True)))
+
+    def test_twitch_variants(self):
+        self.assertRoutes([
+            'https://www.twitch.tv/videos/1234567890',
+            'https://www.twitch.tv/videos/1234567890?t=1h',
+            'https://www.twitch.tv/videos/1234567890/',
+            'https://twitch.tv/somechannel/v/1234567890',
+        ], (TWITCH_KEY, ('https://www.twitch.tv/videos/1234567890', '1234567890', False)))
+
+    def test_rejected_urls(self):
+        self.assertRoutes(['https://www.youtube.com/watch?v=short', 'https://www.youtube.com/channel/x'], (YOUTUBE_KEY, None))
+        self.assertRoutes(['https://example.com/watch?v=dQw4w9WgXcQ', f'ftp://youtube.com/watch?v={VIDEO}', '', 'garbage'], (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import http.client
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from DownloadManager.downloaders.journal import JOB_QUEUED, JobJournal
+from DownloadManager.downloaders.pipeline import DownloadPipeline
+from DownloadManager.service import DownloadService, EventBroadcaster, JobRegistry, JobUrlQueue, create_request_handler
+
+
+class JobUrlQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = JobJournal(os.path.join(self.directory.name, 'journal.db'))
+        self.pipeline = DownloadPipeline(None, 1, journal=self.journal)
+        self.registry = JobRegistry(EventBroadcaster())
+
+    def tearDown(self):
+        self.journal.close()
+        self.directory.cleanup()
+
+    def test_cancelled_job_leaves_no_journal_row(self):
+        cancelled = ('https://www.youtube.com/watch?v=aaaaaaaaaaa', 'aaaaaaaaaaa', False)
+        kept = ('https://www.youtube.com/watch?v=bbbbbbbbbbb', 'bbbbbbbbbbb', False)
+        url_queue = JobUrlQueue(self.registry, 'youtube', self.pipeline)
+        cancelled_job, _ = self.registry.submit([('youtube', cancelled)], [])
+        self.registry.submit([('youtube', kept)], [])
+        for url in (cancelled, kept):
+            self.pipeline.record_job('youtube', url, JOB_QUEUED)
+            url_queue.put(url)
+        self.registry.cancel(cancelled_job.job_id)
+        self.assertEqual(url_queue.get(timeout=1), kept)
+        self.assertEqual(self.journal.unfinished_jobs(), [('youtube', kept)])
+
+
+class ShutdownDownloader:
+    platform = 'youtube'
+    url_routes: dict[str, str] = {}
+    url_parameters = (None, None)
+
+    def __init__(self, registry: JobRegistry):
+        self._registry = registry
+
+    def download_and_index(self, url_queue, pipeline) -> int:
+        while any(job['state'] != 'cancelled' for job in self._registry.list()):
+            time.sleep(0.01)
+        while url_queue.get() is not None:
+            pass
+        return 0
+
+
+class DownloadServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = JobJournal(os.path.join(self.directory.name, 'journal.db'))
+
+    def tearDown(self):
+        self.journal.close()
+        self.directory.cleanup()
+
+    def test_stop_keeps_queued_urls_in_the_journal(self):
+        registry = JobRegistry(EventBroadcaster())
+        service = DownloadService({'youtube': ShutdownDownloader(registry)}, DownloadPipeline(None, 1, journal=self.journal), registry)
+        urls = [
+            ('youtube', ('https://www.youtube.com/watch?v=aaaaaaaaaaa', 'aaaaaaaaaaa', False)),
+            ('youtube', ('https://www.youtube.com/watch?v=bbbbbbbbbbb', 'bbbbbbbbbbb', False)),
+        ]
+        service.submit_urls(urls, [])
+        service.start()
+        service.stop()
+        self.assertEqual(self.journal.unfinished_jobs(), urls)
+
+
+class RequestHandlerTest(unittest.TestCase):
+    def setUp(self):
+        service = DownloadService({}, DownloadPipeline(None, 1), JobRegistry(EventBroadcaster()))
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), create_request_handler(service, lambda: None))
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method: str, path: str, headers: dict[str, str], body: bytes | None = None) -> int:
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        try:
+            connection.request(method, path, body, {'Host': f"127.0.0.1:{self.port}", **headers})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def test_foreign_host_is_rejected(self):
+        self.assertEqual(self.request('GET', '/jobs', {'Host': f"attacker.example:{self.port}"}), 403)
+        self.assertEqual(self.request('GET', '/jobs', {'Host': '127.0.0.1'}), 403)
+
+    def test_local_hosts_are_accepted(self):
+        self.assertEqual(self.request('GET', '/jobs', {}), 200)
+        self.assertEqual(self.request('GET', '/jobs', {'Host': f"localhost:{self.port}"}), 200)
+
+    def test_post_and_delete_require_json_content_type(self):
+        body = json.dumps({'urls': []}).encode('utf-8')
+        self.assertEqual(self.request('POST', '/jobs', {'Content-Type': 'text/plain'}, body), 415)
+        self.assertEqual(self.request('POST', '/jobs', {}, body), 415)
+        self.assertEqual(self.request('DELETE', '/jobs/1', {'Content-Type': 'application/x-www-form-urlencoded'}), 415)
+        self.assertEqual(self.request('POST', '/jobs', {'Content-Type': 'application/json; charset=utf-8'}, body), 201)
+        self.assertEqual(self.request('DELETE', '/jobs/1', {'Content-Type': 'application/json'}), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
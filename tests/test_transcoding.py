@@ -0,0 +1,54 @@
+import json
+import os
+import queue
+import tempfile
+import unittest
+from unittest import mock
+
+from DownloadManager.downloaders.pipeline import PipelineJob, TranscodeStage
+from DownloadManager.downloaders.transcoding import TranscodeProfile, probe_media
+
+
+def probe_output(streams: list[dict]) -> mock.Mock:
+    return mock.Mock(stdout=json.dumps({'streams': streams, 'format': {'bit_rate': '2000000', 'duration': '60.0'}}))
+
+
+class ProbeMediaTest(unittest.TestCase):
+    def test_container_bitrate_is_not_given_to_every_stream(self):
+        streams = [{'codec_type': 'video', 'codec_name': 'h264'}, {'codec_type': 'audio', 'codec_name': 'opus'}]
+        with mock.patch('subprocess.run', return_value=probe_output(streams)):
+            media = probe_media('video.mkv')
+        self.assertEqual([stream.bit_rate for stream in media.streams], [None, None])
+        self.assertEqual(TranscodeProfile('mkv', 'libx264', '128', '28', 'fast').audio_args(media.first_stream('audio')), ['-c:a', 'copy'])
+
+    def test_single_stream_uses_the_container_bitrate(self):
+        with mock.patch('subprocess.run', return_value=probe_output([{'codec_type': 'audio', 'codec_name': 'opus'}])):
+            media = probe_media('audio.opus')
+        self.assertEqual(media.first_stream('audio').bit_rate, 2000000)
+        self.assertEqual(TranscodeProfile('opus', None, '128').audio_args(media.first_stream('audio')), ['-c:a', 'libopus', '-b:a', '128k'])
+
+
+class TranscodeStageTest(unittest.TestCase):
+    def test_renditions_share_the_threads_of_one_slot(self):
+        def fake_ffmpeg(args: list[str]) -> int:
+            for path in args[1:]:
+                if '.temp.' in path:
+                    open(path, 'w').close()
+            return 0
+
+        with tempfile.TemporaryDirectory() as path_to_dir:
+            path_to_source = os.path.join(path_to_dir, 'video.mp4')
+            open(path_to_source, 'w').close()
+            profile = TranscodeProfile('mkv', 'libx264', '128', '28', 'fast')
+            profile.renditions = {'480p': TranscodeProfile('mkv', 'libx264', '96', '30', 'fast', '480')}
+            stage = TranscodeStage(queue.Queue(), 8, None, stream_copy=False)
+            job = PipelineJob('youtube', 'url', 'code', 'Video', 'Uploader', path_to_source, profile)
+            with mock.patch('DownloadManager.downloaders.pipeline.run_ffmpeg', side_effect=fake_ffmpeg) as run_ffmpeg:
+                self.assertTrue(stage.transcode(job))
+        args = run_ffmpeg.call_args.args[0]
+        self.assertEqual(stage.threads_per_job, 4)
+        self.assertEqual([args[index + 1] for index, arg in enumerate(args) if arg == '-threads'], ['2', '2'])
+
+
+if __name__ == '__main__':
+    unittest.main()